@@ -101,6 +101,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'integration.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'integration.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
 }
@@ -114,6 +123,118 @@ MOYSKLAD_API_URL = os.getenv('MOYSKLAD_API_URL', 'https://api.moysklad.ru/api/re
 MOYSKLAD_LOGIN = os.getenv('MOYSKLAD_LOGIN', '')
 MOYSKLAD_PASSWORD = os.getenv('MOYSKLAD_PASSWORD', '')
 MOYSKLAD_TOKEN = os.getenv('MOYSKLAD_TOKEN', '')
+# Часовой пояс аккаунта МойСклад (в нём интерпретируются даты в фильтрах)
+MOYSKLAD_TIMEZONE = os.getenv('MOYSKLAD_TIMEZONE', 'Europe/Moscow')
+
+# Разбор ответов МойСклад и JSON API: 'json' или 'orjson' (если пакет установлен)
+MOYSKLAD_JSON_BACKEND = os.getenv('MOYSKLAD_JSON_BACKEND', 'json')
+
+# Потоковый разбор страниц (пакет ijson): строки разбираются по одной прямо из
+# gzip-потока ответа, страницы загружаются последовательно
+MOYSKLAD_STREAM_JSON = os.getenv('MOYSKLAD_STREAM_JSON', 'False') == 'True'
+
+# Пул HTTP-соединений к МойСклад (одна сессия на процесс)
+MOYSKLAD_POOL_CONNECTIONS = int(os.getenv('MOYSKLAD_POOL_CONNECTIONS', '4'))
+MOYSKLAD_POOL_MAXSIZE = int(os.getenv('MOYSKLAD_POOL_MAXSIZE', '10'))
+MOYSKLAD_KEEP_ALIVE = os.getenv('MOYSKLAD_KEEP_ALIVE', 'True') == 'True'
+MOYSKLAD_CONNECT_TIMEOUT = float(os.getenv('MOYSKLAD_CONNECT_TIMEOUT', '5'))
+MOYSKLAD_READ_TIMEOUT = float(os.getenv('MOYSKLAD_READ_TIMEOUT', '60'))
+
+# Размер страницы при выгрузке коллекций (максимум МойСклад — 1000)
+MOYSKLAD_PAGE_SIZE = int(os.getenv('MOYSKLAD_PAGE_SIZE', '1000'))
+
+# Параллельная загрузка страниц (МойСклад допускает не более 5 одновременных запросов)
+MOYSKLAD_MAX_WORKERS = int(os.getenv('MOYSKLAD_MAX_WORKERS', '4'))
+# Одновременных запросов на процесс, по всем синхронизациям и потокам (лимит МойСклад — 5)
+MOYSKLAD_MAX_PARALLEL_REQUESTS = int(os.getenv('MOYSKLAD_MAX_PARALLEL_REQUESTS', '5'))
+
+# Элементов в одном массовом POST (максимум МойСклад — 1000)
+MOYSKLAD_BATCH_POST_SIZE = int(os.getenv('MOYSKLAD_BATCH_POST_SIZE', '1000'))
+
+# Лимит запросов (МойСклад: 45 запросов за 3 секунды) и повторы временных ошибок
+MOYSKLAD_RATE_LIMIT = int(os.getenv('MOYSKLAD_RATE_LIMIT', '45'))
+MOYSKLAD_RATE_PERIOD = float(os.getenv('MOYSKLAD_RATE_PERIOD', '3'))
+MOYSKLAD_MAX_RETRIES = int(os.getenv('MOYSKLAD_MAX_RETRIES', '5'))
+MOYSKLAD_RETRY_BASE_DELAY = float(os.getenv('MOYSKLAD_RETRY_BASE_DELAY', '0.5'))
+MOYSKLAD_RETRY_MAX_DELAY = float(os.getenv('MOYSKLAD_RETRY_MAX_DELAY', '30'))
+
+# Инкрементальная синхронизация: полная выгрузка не реже, чем раз в N часов
+MOYSKLAD_FULL_SYNC_INTERVAL_HOURS = float(os.getenv('MOYSKLAD_FULL_SYNC_INTERVAL_HOURS', '24'))
+
+# Размер пачки для пакетной записи в БД
+MOYSKLAD_SYNC_BATCH_SIZE = int(os.getenv('MOYSKLAD_SYNC_BATCH_SIZE', '500'))
+
+# Способ загрузки: 'orm' (пакетный bulk_create) или 'copy' (COPY во временную
+# таблицу + INSERT ... ON CONFLICT, только PostgreSQL)
+MOYSKLAD_SYNC_LOAD_STRATEGY = os.getenv('MOYSKLAD_SYNC_LOAD_STRATEGY', 'orm')
+
+# Полный запуск снимает с активности товары, которых нет в МойСклад, только если
+# получено не меньше этой доли от текущего числа товаров (защита от частичной выгрузки)
+MOYSKLAD_SWEEP_MIN_RATIO = float(os.getenv('MOYSKLAD_SWEEP_MIN_RATIO', '0.5'))
+
+# Фоновые задания синхронизации (run_sync_worker): интервал опроса очереди, секунды,
+# и время, после которого выполняющееся задание проверяется на потерю, минуты
+# (потерянным считается задание, блокировку синхронизации которого никто не держит)
+MOYSKLAD_SYNC_WORKER_INTERVAL = float(os.getenv('MOYSKLAD_SYNC_WORKER_INTERVAL', '5'))
+MOYSKLAD_SYNC_JOB_TIMEOUT_MINUTES = float(os.getenv('MOYSKLAD_SYNC_JOB_TIMEOUT_MINUTES', '180'))
+
+# Расписание run_sync_scheduler: имя -> тип синхронизации, интервал в секундах
+# (или время ежедневного запуска 'at': 'ЧЧ:ММ' по TIME_ZONE) и параметры запуска
+MOYSKLAD_SYNC_SCHEDULE = {
+    'stock': {
+        'sync_type': 'stock',
+        'interval': int(os.getenv('MOYSKLAD_SCHEDULE_STOCK_INTERVAL', '60')),
+        'params': {'current': True},
+    },
+    'products': {
+        'sync_type': 'products',
+        'interval': int(os.getenv('MOYSKLAD_SCHEDULE_PRODUCTS_INTERVAL', '300')),
+    },
+    'full': {
+        'sync_type': 'all',
+        'at': os.getenv('MOYSKLAD_SCHEDULE_FULL_SYNC_AT', '03:00'),
+        'params': {'full': True},
+    },
+}
+# Случайная добавка к каждому запуску, секунды (чтобы узлы не стартовали одновременно)
+MOYSKLAD_SCHEDULER_JITTER = float(os.getenv('MOYSKLAD_SCHEDULER_JITTER', '10'))
+
+# sync_all: сколько этапов выполняется одновременно (MOYSKLAD_MAX_WORKERS
+# параллельных запросов делится между ними)
+MOYSKLAD_SYNC_ALL_PARALLEL = int(os.getenv('MOYSKLAD_SYNC_ALL_PARALLEL', '2'))
+
+# Шардирование полной синхронизации (sync_sharded / run_shard_worker): страниц
+# в шарде, срок аренды шарда обработчиком (секунды) и число попыток на шард
+MOYSKLAD_SHARD_PAGES = int(os.getenv('MOYSKLAD_SHARD_PAGES', '10'))
+MOYSKLAD_SHARD_LEASE_SECONDS = int(os.getenv('MOYSKLAD_SHARD_LEASE_SECONDS', '300'))
+MOYSKLAD_SHARD_MAX_ATTEMPTS = int(os.getenv('MOYSKLAD_SHARD_MAX_ATTEMPTS', '3'))
+
+# Вебхуки МойСклад: секрет в параметре ?token= адреса вебхука (пусто — вебхуки отклоняются),
+# событий за один разбор, ID в одном запросе к API, попыток на событие, срок захвата
+# пачки обработчиком и задержка событий товаров, пока идёт синхронизация товаров (секунды)
+MOYSKLAD_WEBHOOK_TOKEN = os.getenv('MOYSKLAD_WEBHOOK_TOKEN', '')
+MOYSKLAD_WEBHOOK_BATCH_SIZE = int(os.getenv('MOYSKLAD_WEBHOOK_BATCH_SIZE', '1000'))
+MOYSKLAD_WEBHOOK_FETCH_BATCH = int(os.getenv('MOYSKLAD_WEBHOOK_FETCH_BATCH', '100'))
+MOYSKLAD_WEBHOOK_MAX_ATTEMPTS = int(os.getenv('MOYSKLAD_WEBHOOK_MAX_ATTEMPTS', '5'))
+MOYSKLAD_WEBHOOK_LEASE_SECONDS = int(os.getenv('MOYSKLAD_WEBHOOK_LEASE_SECONDS', '600'))
+MOYSKLAD_WEBHOOK_DEFER_SECONDS = int(os.getenv('MOYSKLAD_WEBHOOK_DEFER_SECONDS', '60'))
+
+# Исходящая очередь заказов (push_orders): заказов в одном массовом POST, срок захвата
+# пачки обработчиком (секунды), попыток на заказ, начальная и максимальная задержка
+# повтора (секунды, удваивается с каждой попыткой)
+MOYSKLAD_ORDER_PUSH_BATCH_SIZE = int(os.getenv('MOYSKLAD_ORDER_PUSH_BATCH_SIZE', '100'))
+MOYSKLAD_ORDER_PUSH_LEASE_SECONDS = int(os.getenv('MOYSKLAD_ORDER_PUSH_LEASE_SECONDS', '300'))
+MOYSKLAD_ORDER_PUSH_MAX_ATTEMPTS = int(os.getenv('MOYSKLAD_ORDER_PUSH_MAX_ATTEMPTS', '10'))
+MOYSKLAD_ORDER_PUSH_RETRY_DELAY = float(os.getenv('MOYSKLAD_ORDER_PUSH_RETRY_DELAY', '30'))
+MOYSKLAD_ORDER_PUSH_MAX_DELAY = float(os.getenv('MOYSKLAD_ORDER_PUSH_MAX_DELAY', '3600'))
+
+# Доп. поля МойСклад, из которых заполняются бренд и флаги products.Product
+MOYSKLAD_BRAND_ATTRIBUTE = os.getenv('MOYSKLAD_BRAND_ATTRIBUTE', 'Бренд')
+MOYSKLAD_FLAG_ATTRIBUTES = {
+    'is_kaspi': os.getenv('MOYSKLAD_KASPI_ATTRIBUTE', 'Kaspi'),
+    'is_satu': os.getenv('MOYSKLAD_SATU_ATTRIBUTE', 'Satu'),
+    'is_promo': os.getenv('MOYSKLAD_PROMO_ATTRIBUTE', 'Акция'),
+}
 
 # Spectacular settings
 SPECTACULAR_SETTINGS = {
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Product, ProductCategory, Order, SyncLog
+from .services.order_push import requeue_orders
+from .models import Product, ProductCategory, Order, SyncLog, SyncState, SyncJob, SyncShard, WebhookEvent
 
 
 @admin.register(Product)
@@ -7,7 +8,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ['name', 'article', 'price', 'stock', 'is_active', 'last_sync']
     list_filter = ['is_active', 'archived', 'created_at']
     search_fields = ['name', 'article', 'code', 'moysklad_id']
-    readonly_fields = ['moysklad_id', 'created_at', 'updated_at', 'last_sync']
+    readonly_fields = ['moysklad_id', 'created_at', 'updated_at', 'last_sync', 'seen_at', 'removed_at']
     
     fieldsets = (
         ('Основная информация', {
@@ -17,13 +18,13 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('price', 'cost', 'stock', 'reserve')
         }),
         ('Статус', {
-            'fields': ('is_active', 'archived')
+            'fields': ('is_active', 'archived', 'removed_at')
         }),
         ('Дополнительно', {
             'fields': ('external_code', 'barcode', 'moysklad_id')
         }),
         ('Служебная информация', {
-            'fields': ('created_at', 'updated_at', 'last_sync'),
+            'fields': ('created_at', 'updated_at', 'last_sync', 'seen_at'),
             'classes': ('collapse',)
         }),
     )
@@ -38,10 +39,12 @@ class ProductCategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ['number', 'customer_name', 'status', 'total_amount', 'order_date']
-    list_filter = ['status', 'order_date']
-    search_fields = ['number', 'customer_name', 'customer_phone', 'moysklad_id']
-    readonly_fields = ['moysklad_id', 'created_at', 'updated_at', 'last_sync']
+    list_display = ['number', 'customer_name', 'status', 'total_amount', 'order_date', 'push_status']
+    list_filter = ['status', 'push_status', 'order_date']
+    search_fields = ['number', 'customer_name', 'customer_phone', 'moysklad_id', 'external_code']
+    readonly_fields = ['moysklad_id', 'created_at', 'updated_at', 'last_sync',
+                       'external_code', 'push_status', 'push_attempts', 'next_push_at', 'push_error']
+    actions = ['requeue']
     
     fieldsets = (
         ('Информация о заказе', {
@@ -53,23 +56,74 @@ class OrderAdmin(admin.ModelAdmin):
         ('Доставка', {
             'fields': ('delivery_address', 'comment')
         }),
+        ('Отправка в МойСклад', {
+            'fields': ('payload', 'external_code', 'push_status', 'push_attempts', 'next_push_at', 'push_error')
+        }),
         ('Служебная информация', {
             'fields': ('moysklad_id', 'created_at', 'updated_at', 'last_sync'),
             'classes': ('collapse',)
         }),
     )
+    
+    @admin.action(description='Повторить отправку в МойСклад')
+    def requeue(self, request, queryset):
+        self.message_user(request, f'Возвращено в очередь: {requeue_orders(queryset)}')
 
 
 @admin.register(SyncLog)
 class SyncLogAdmin(admin.ModelAdmin):
-    list_display = ['sync_type', 'status', 'items_processed', 'items_created', 
-                    'items_updated', 'started_at', 'finished_at']
-    list_filter = ['sync_type', 'status', 'started_at']
-    readonly_fields = ['sync_type', 'status', 'items_processed', 'items_created', 
-                       'items_updated', 'error_message', 'started_at', 'finished_at']
+    list_display = ['sync_type', 'status', 'is_full', 'items_processed', 'items_created', 
+                    'items_updated', 'items_unchanged', 'started_at', 'finished_at']
+    list_filter = ['sync_type', 'status', 'is_full', 'started_at']
+    readonly_fields = ['sync_type', 'status', 'is_full', 'pages_processed', 'items_processed',
+                       'items_created', 'items_updated', 'items_unchanged', 'stats', 'checkpoint', 'parent', 'error_message', 'started_at', 'finished_at']
     
     def has_add_permission(self, request):
         return False
     
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(SyncState)
+class SyncStateAdmin(admin.ModelAdmin):
+    list_display = ['sync_type', 'watermark', 'last_full_sync', 'updated_at']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job_type', 'status', 'params', 'worker', 'created_at', 'started_at', 'finished_at']
+    list_filter = ['job_type', 'status', 'created_at']
+    readonly_fields = ['job_type', 'params', 'dedup_key', 'status', 'sync_log', 'worker',
+                       'error_message', 'created_at', 'started_at', 'finished_at']
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(SyncShard)
+class SyncShardAdmin(admin.ModelAdmin):
+    list_display = ['id', 'sync_log', 'endpoint', 'offset', 'size', 'status', 'worker',
+                    'attempts', 'lease_until', 'items_processed']
+    list_filter = ['endpoint', 'status']
+    readonly_fields = ['sync_log', 'endpoint', 'params', 'offset', 'size', 'limit', 'status', 'worker',
+                       'lease_until', 'attempts', 'pages_processed', 'items_processed', 'items_created',
+                       'items_updated', 'items_unchanged', 'stats', 'watermark', 'error_message',
+                       'created_at', 'finished_at']
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'entity_type', 'action', 'moysklad_id', 'status', 'attempts',
+                    'received_at', 'processed_at']
+    list_filter = ['entity_type', 'action', 'status', 'received_at']
+    search_fields = ['moysklad_id']
+    readonly_fields = ['entity_type', 'action', 'moysklad_id', 'payload', 'status', 'attempts',
+                       'error_message', 'next_attempt_at', 'received_at', 'processed_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,59 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from integration.services.moysklad_api import MoySkladAPI
+from integration.services.webhooks import process_webhook_batch
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Разбор очереди событий вебхуков МойСклад (WebhookEvent)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать накопившиеся события и завершиться'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Интервал опроса очереди, секунды (по умолчанию MOYSKLAD_SYNC_WORKER_INTERVAL)'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.MOYSKLAD_SYNC_WORKER_INTERVAL
+        api = MoySkladAPI()
+        self.stopping = False
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write('Обработчик вебхуков запущен')
+
+        while not self.stopping:
+            sync_log = process_webhook_batch(api)
+            if sync_log is None:
+                if options['once']:
+                    break
+                time.sleep(interval)
+                continue
+
+            if sync_log.status == 'success':
+                self.stdout.write(self.style.SUCCESS(
+                    f'Пачка событий обработана: {sync_log.items_processed} загружено, {sync_log.stats}'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'Ошибка: {sync_log.error_message}'))
+                # Пачка вернулась в очередь, повтор не раньше следующего опроса
+                time.sleep(interval)
+
+        self.stdout.write('Обработчик вебхуков остановлен')
+
+    def _stop(self, signum, frame):
+        self.stopping = True
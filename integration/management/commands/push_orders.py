@@ -0,0 +1,58 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from integration.services.moysklad_api import MoySkladAPI
+from integration.services.order_push import push_orders
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Отправка заказов магазина из исходящей очереди в МойСклад'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить накопившиеся заказы и завершиться'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Интервал опроса очереди, секунды (по умолчанию MOYSKLAD_SYNC_WORKER_INTERVAL)'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.MOYSKLAD_SYNC_WORKER_INTERVAL
+        api = MoySkladAPI()
+        self.stopping = False
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write('Отправка заказов запущена')
+
+        while not self.stopping:
+            result = push_orders(api)
+            if result is None:
+                if options['once']:
+                    break
+                time.sleep(interval)
+                continue
+
+            sent, delayed, failed = result
+            self.stdout.write(f'Пачка заказов: {sent} отправлено, {delayed} отложено, {failed} с ошибкой')
+            if delayed and not sent:
+                # МойСклад недоступен, повтор не раньше следующего опроса
+                if options['once']:
+                    break
+                time.sleep(interval)
+
+        self.stdout.write('Отправка заказов остановлена')
+
+    def _stop(self, signum, frame):
+        self.stopping = True
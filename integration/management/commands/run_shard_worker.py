@@ -0,0 +1,71 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from integration.services.jobs import get_worker_name
+from integration.services.moysklad_api import MoySkladAPI
+from integration.services.sharding import claim_shard, process_shard
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Обработчик шардов распределённой синхронизации (SyncShard)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Количество параллельных запросов к МойСклад (по умолчанию MOYSKLAD_MAX_WORKERS)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать доступные шарды и завершиться'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Интервал опроса, секунды (по умолчанию MOYSKLAD_SYNC_WORKER_INTERVAL)'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.MOYSKLAD_SYNC_WORKER_INTERVAL
+        worker = get_worker_name()
+        api = MoySkladAPI()
+        self.stopping = False
+
+        # Текущий шард доводится до конца, новые не берутся
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f'Обработчик шардов {worker} запущен')
+
+        while not self.stopping:
+            shard = claim_shard(worker)
+            if shard is None:
+                if options['once']:
+                    break
+                time.sleep(interval)
+                continue
+
+            self.stdout.write(f'Шард #{shard.pk}: {shard}')
+            try:
+                process_shard(api, shard, workers=options['workers'])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Шард #{shard.pk}: {e}'))
+                continue
+
+            self.stdout.write(
+                f'  {shard.get_status_display()}: {shard.items_processed} обработано, '
+                f'{shard.items_created} создано, {shard.items_updated} обновлено'
+            )
+
+        self.stdout.write('Обработчик шардов остановлен')
+
+    def _stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,53 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from integration.services.scheduler import get_schedule, start_scheduler
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Планировщик синхронизаций по расписанию MOYSKLAD_SYNC_SCHEDULE'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            default=None,
+            help='Запускать только указанные записи расписания'
+        )
+
+    def handle(self, *args, **options):
+        schedule = get_schedule(
+            settings.MOYSKLAD_SYNC_SCHEDULE,
+            jitter=settings.MOYSKLAD_SCHEDULER_JITTER,
+            only=options['only'],
+        )
+        if not schedule:
+            raise CommandError('Расписание пусто')
+
+        self.stop = threading.Event()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write('Планировщик синхронизаций запущен:')
+        for entry in schedule:
+            self.stdout.write(f'  {entry}')
+
+        threads = start_scheduler(schedule, self.stop)
+
+        # Ожидание с таймаутом, чтобы главный поток обрабатывал сигналы
+        while not self.stop.wait(1):
+            pass
+
+        self.stdout.write('Остановка: ожидание текущих синхронизаций...')
+        for thread in threads:
+            thread.join()
+
+        self.stdout.write('Планировщик синхронизаций остановлен')
+
+    def _stop(self, signum, frame):
+        self.stop.set()
@@ -0,0 +1,62 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from integration.services.jobs import claim_job, expire_stale_jobs, get_worker_name, run_job
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Обработчик очереди фоновых заданий синхронизации (SyncJob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить задания из очереди и завершиться'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Интервал опроса очереди, секунды (по умолчанию MOYSKLAD_SYNC_WORKER_INTERVAL)'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.MOYSKLAD_SYNC_WORKER_INTERVAL
+        worker = get_worker_name()
+        self.stopping = False
+
+        # Текущее задание доводится до конца, новые не берутся
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f'Обработчик заданий {worker} запущен')
+
+        while not self.stopping:
+            expired = expire_stale_jobs()
+            if expired:
+                self.stdout.write(self.style.WARNING(f'Помечено зависших заданий: {expired}'))
+
+            job = claim_job(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(interval)
+                continue
+
+            self.stdout.write(f'Задание #{job.pk}: {job.get_job_type_display()} {job.params}')
+            run_job(job)
+
+            if job.status == 'success':
+                self.stdout.write(self.style.SUCCESS(f'Задание #{job.pk} выполнено'))
+            else:
+                self.stdout.write(self.style.ERROR(f'Задание #{job.pk}: {job.error_message}'))
+
+        self.stdout.write('Обработчик заданий остановлен')
+
+    def _stop(self, signum, frame):
+        self.stopping = True
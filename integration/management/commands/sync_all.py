@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from integration.models import SyncLog
+from integration.services.moysklad_api import MoySkladAPI
+from integration.services.orchestrator import SYNC_ALL_STAGES, run_all
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Параллельная синхронизация всех данных из МойСклад (товары, цены, склады, остатки)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--parallel',
+            type=int,
+            default=None,
+            help='Сколько этапов выполнять одновременно (по умолчанию MOYSKLAD_SYNC_ALL_PARALLEL)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Полная синхронизация товаров вместо инкрементальной'
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=list(SYNC_ALL_STAGES),
+            default=None,
+            help='Выполнить только указанные этапы'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Начинаем синхронизацию всех данных...')
+        
+        sync_log = SyncLog.start('all')
+        
+        try:
+            api = MoySkladAPI()
+            run_all(
+                api, sync_log,
+                {'full': options['full']},
+                stages=options['only'],
+                parallel=options['parallel'],
+            )
+            sync_log.finish()
+            
+            self.stdout.write(self.style.SUCCESS('\nСинхронизация всех данных завершена:'))
+            
+        except Exception as e:
+            sync_log.finish(error=e)
+            
+            self.stdout.write(self.style.ERROR(f'Ошибка: {e}'))
+        
+        for child in sync_log.children.order_by('started_at'):
+            self.stdout.write(
+                f'  {child.get_sync_type_display()}: {child.get_status_display()}, '
+                f'{child.items_processed} обработано ({child.error_message or "без ошибок"})'
+            )
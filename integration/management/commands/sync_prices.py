@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from integration.models import SyncLog
+from integration.services.locks import advisory_lock, get_sync_lock_name
+from integration.services.moysklad_api import MoySkladAPI
+from integration.services.price_sync import sync_prices
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Синхронизация типов цен и цен товаров из МойСклад'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Количество параллельных запросов к МойСклад (по умолчанию MOYSKLAD_MAX_WORKERS)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Начинаем синхронизацию цен...')
+        
+        with advisory_lock(get_sync_lock_name('prices')) as acquired:
+            if not acquired:
+                message = 'Синхронизация цен уже выполняется, запуск пропущен'
+                logger.warning(message)
+                SyncLog.skip('prices', message)
+                self.stdout.write(self.style.WARNING(message))
+                return
+            
+            sync_log = SyncLog.objects.create(
+                sync_type='prices',
+                status='started'
+            )
+            
+            try:
+                api = MoySkladAPI()
+                sync_prices(api, sync_log, workers=options['workers'])
+            
+                sync_log.status = 'success'
+                sync_log.finished_at = timezone.now()
+                sync_log.save()
+            
+                self.stdout.write(self.style.SUCCESS(
+                    f'\nСинхронизация цен завершена: {sync_log.items_created} создано, '
+                    f'{sync_log.items_updated} обновлено ({sync_log.items_processed} товаров)'
+                ))
+            
+            except Exception as e:
+                sync_log.status = 'error'
+                sync_log.error_message = str(e)
+                sync_log.finished_at = timezone.now()
+                sync_log.save()
+            
+                self.stdout.write(self.style.ERROR(f'Ошибка: {e}'))
@@ -1,80 +1,80 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from integration.models import Product, SyncLog
+from integration.models import SyncLog
+from integration.services.locks import advisory_lock, get_sync_lock_name
 from integration.services.moysklad_api import MoySkladAPI
+from integration.services.pipeline import CatalogPipeline
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    help = 'Синхронизация товаров из МойСклад'
+    help = 'Синхронизация товаров из МойСклад (товары, карточки PIM, цены)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Количество параллельных запросов к МойСклад (по умолчанию MOYSKLAD_MAX_WORKERS)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Полная синхронизация вместо инкрементальной (по метке updated)'
+        )
+        parser.add_argument(
+            '--with-stock',
+            action='store_true',
+            help='После товаров загрузить склады и остатки по складам'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить последний прерванный запуск (ошибка или остановка процесса) с его контрольной точки'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write('Начинаем синхронизацию товаров...')
         
-        sync_log = SyncLog.objects.create(
-            sync_type='products',
-            status='started'
-        )
-        
-        try:
-            api = MoySkladAPI()
-            products = api.sync_all_products()
+        with advisory_lock(get_sync_lock_name('products')) as acquired:
+            if not acquired:
+                message = 'Синхронизация товаров уже выполняется, запуск пропущен'
+                logger.warning(message)
+                SyncLog.skip('products', message, is_full=options['full'])
+                self.stdout.write(self.style.WARNING(message))
+                return
             
-            items_created = 0
-            items_updated = 0
+            sync_log = SyncLog.start('products', resume=options['resume'])
             
-            for product_data in products:
-                moysklad_id = product_data.get('id')
-                
-                # Получение цены
-                price = 0
-                sale_prices = product_data.get('salePrices', [])
-                if sale_prices:
-                    price = sale_prices[0].get('value', 0) / 100
-                
-                # Подготовка данных
-                product_info = {
-                    'name': product_data.get('name', ''),
-                    'code': product_data.get('code'),
-                    'article': product_data.get('article'),
-                    'description': product_data.get('description'),
-                    'price': price,
-                    'archived': product_data.get('archived', False),
-                    'external_code': product_data.get('externalCode'),
-                    'raw_data': product_data,
-                }
-                
-                # Создание или обновление товара
-                product, created = Product.objects.update_or_create(
-                    moysklad_id=moysklad_id,
-                    defaults=product_info
+            try:
+                api = MoySkladAPI()
+                pipeline = CatalogPipeline(api, sync_log, workers=options['workers'])
+                pipeline.run(
+                    full=options['full'] or None,
+                    stock=options['with_stock'],
+                    progress=self._report_page,
+                    resume=options['resume'],
                 )
-                
-                if created:
-                    items_created += 1
-                    self.stdout.write(f'  Создан: {product.name}')
-                else:
-                    items_updated += 1
-                    self.stdout.write(f'  Обновлен: {product.name}')
             
-            # Обновление лога
-            sync_log.status = 'success'
-            sync_log.items_processed = len(products)
-            sync_log.items_created = items_created
-            sync_log.items_updated = items_updated
-            sync_log.finished_at = timezone.now()
-            sync_log.save()
+                # Обновление лога
+                sync_log.status = 'success'
+                sync_log.finished_at = timezone.now()
+                sync_log.save()
             
-            self.stdout.write(self.style.SUCCESS(
-                f'\nСинхронизация завершена: {items_created} создано, {items_updated} обновлено'
-            ))
+                self.stdout.write(self.style.SUCCESS(
+                    f'\nСинхронизация завершена: {sync_log.items_created} создано, '
+                    f'{sync_log.items_updated} обновлено, {sync_log.items_unchanged} без изменений'
+                ))
             
-        except Exception as e:
-            sync_log.status = 'error'
-            sync_log.error_message = str(e)
-            sync_log.finished_at = timezone.now()
-            sync_log.save()
+            except Exception as e:
+                sync_log.status = 'error'
+                sync_log.error_message = str(e)
+                sync_log.finished_at = timezone.now()
+                sync_log.save()
             
-            self.stdout.write(self.style.ERROR(f'Ошибка: {e}'))
+                self.stdout.write(self.style.ERROR(f'Ошибка: {e}'))
+
+    def _report_page(self, page_number, created, updated):
+        self.stdout.write(f'  Страница {page_number}: {created} создано, {updated} обновлено')
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from integration.models import SyncLog
+from integration.services.jobs import get_worker_name
+from integration.services.moysklad_api import MoySkladAPI
+from integration.services.sharding import sync_products_sharded
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Полная синхронизация товаров, распределённая по шардам между run_shard_worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Количество параллельных запросов к МойСклад (по умолчанию MOYSKLAD_MAX_WORKERS)'
+        )
+        parser.add_argument(
+            '--with-stock',
+            action='store_true',
+            help='После товаров так же по шардам загрузить остатки по складам'
+        )
+        parser.add_argument(
+            '--no-work',
+            action='store_true',
+            help='Только разбить на шарды и дождаться обработчиков, не обрабатывать самому'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Начинаем распределённую синхронизацию товаров...')
+        
+        sync_log = SyncLog.start('products')
+        
+        try:
+            api = MoySkladAPI()
+            sync_products_sharded(
+                api, sync_log, get_worker_name(),
+                work=not options['no_work'],
+                stock=options['with_stock'],
+                workers=options['workers'],
+            )
+            sync_log.finish()
+            
+            self.stdout.write(self.style.SUCCESS(
+                f'\nСинхронизация завершена: {sync_log.items_created} создано, '
+                f'{sync_log.items_updated} обновлено, {sync_log.items_unchanged} без изменений '
+                f'({sync_log.shards.count()} шардов)'
+            ))
+            
+        except Exception as e:
+            sync_log.finish(error=e)
+            
+            self.stdout.write(self.style.ERROR(f'Ошибка: {e}'))
@@ -1,7 +1,9 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from integration.models import Product, SyncLog
+from integration.models import SyncLog
+from integration.services.locks import advisory_lock, get_sync_lock_name
 from integration.services.moysklad_api import MoySkladAPI
+from integration.services.stock_sync import sync_current_stock, sync_stock
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,55 +12,66 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Синхронизация остатков товаров из МойСклад'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Количество параллельных запросов к МойСклад (по умолчанию MOYSKLAD_MAX_WORKERS)'
+        )
+        parser.add_argument(
+            '--current',
+            action='store_true',
+            help='Быстрое обновление по report/stock/all/current (только изменившиеся позиции)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='С --current: полный срез текущих остатков без changedSince'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить последний прерванный запуск (ошибка или остановка процесса) с его контрольной точки'
+        )
+
     def handle(self, *args, **options):
         self.stdout.write('Начинаем синхронизацию остатков...')
         
-        sync_log = SyncLog.objects.create(
-            sync_type='stock',
-            status='started'
-        )
-        
-        try:
-            api = MoySkladAPI()
-            stock_data = api.get_stock(limit=1000)
+        with advisory_lock(get_sync_lock_name('stock')) as acquired:
+            if not acquired:
+                message = 'Синхронизация остатков уже выполняется, запуск пропущен'
+                logger.warning(message)
+                SyncLog.skip('stock', message)
+                self.stdout.write(self.style.WARNING(message))
+                return
             
-            items_updated = 0
+            sync_log = SyncLog.start('stock', resume=options['resume'])
             
-            for item in stock_data.get('rows', []):
-                # Извлекаем ID товара из meta.href
-                meta = item.get('meta', {})
-                href = meta.get('href', '')
-                if '/product/' in href:
-                    moysklad_id = href.split('/product/')[-1]
+            try:
+                api = MoySkladAPI()
+                if options['current']:
+                    sync_current_stock(api, sync_log, full=options['full'])
                 else:
-                    continue
-                
-                try:
-                    product = Product.objects.get(moysklad_id=moysklad_id)
-                    product.stock = item.get('stock', 0)
-                    product.reserve = item.get('reserve', 0)
-                    product.save(update_fields=['stock', 'reserve', 'last_sync'])
-                    items_updated += 1
-                    self.stdout.write(f'  Обновлен остаток: {product.name} - {product.stock} шт.')
-                except Product.DoesNotExist:
-                    self.stdout.write(self.style.WARNING(
-                        f'  Товар с ID {moysklad_id} не найден'
-                    ))
+                    sync_stock(
+                        api, sync_log,
+                        workers=options['workers'],
+                        checkpoint=sync_log.checkpoint if options['resume'] else None,
+                    )
             
-            sync_log.status = 'success'
-            sync_log.items_processed = len(stock_data.get('rows', []))
-            sync_log.items_updated = items_updated
-            sync_log.finished_at = timezone.now()
-            sync_log.save()
+                sync_log.status = 'success'
+                sync_log.finished_at = timezone.now()
+                sync_log.save()
             
-            self.stdout.write(self.style.SUCCESS(
-                f'\nСинхронизация остатков завершена: {items_updated} обновлено'
-            ))
+                self.stdout.write(self.style.SUCCESS(
+                    f'\nСинхронизация остатков завершена: {sync_log.items_updated} обновлено '
+                    f'из {sync_log.items_processed} ({sync_log.pages_processed} стр.)'
+                ))
             
-        except Exception as e:
-            sync_log.status = 'error'
-            sync_log.error_message = str(e)
-            sync_log.finished_at = timezone.now()
-            sync_log.save()
+            except Exception as e:
+                sync_log.status = 'error'
+                sync_log.error_message = str(e)
+                sync_log.finished_at = timezone.now()
+                sync_log.save()
             
-            self.stdout.write(self.style.ERROR(f'Ошибка: {e}'))
+                self.stdout.write(self.style.ERROR(f'Ошибка: {e}'))
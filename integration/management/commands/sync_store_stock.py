@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from integration.models import SyncLog
+from integration.services.locks import advisory_lock, get_sync_lock_name
+from integration.services.moysklad_api import MoySkladAPI
+from integration.services.warehouse_sync import sync_store_stock
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Синхронизация складов и остатков по складам из МойСклад'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Количество параллельных запросов к МойСклад (по умолчанию MOYSKLAD_MAX_WORKERS)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить последний прерванный запуск (ошибка или остановка процесса) с его контрольной точки'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Начинаем синхронизацию остатков по складам...')
+        
+        with advisory_lock(get_sync_lock_name('store_stock')) as acquired:
+            if not acquired:
+                message = 'Синхронизация остатков по складам уже выполняется, запуск пропущен'
+                logger.warning(message)
+                SyncLog.skip('store_stock', message)
+                self.stdout.write(self.style.WARNING(message))
+                return
+            
+            sync_log = SyncLog.start('store_stock', resume=options['resume'])
+            
+            try:
+                api = MoySkladAPI()
+                sync_store_stock(
+                    api, sync_log,
+                    workers=options['workers'],
+                    checkpoint=sync_log.checkpoint if options['resume'] else None,
+                )
+            
+                sync_log.status = 'success'
+                sync_log.finished_at = timezone.now()
+                sync_log.save()
+            
+                self.stdout.write(self.style.SUCCESS(
+                    f'\nСинхронизация остатков по складам завершена: {sync_log.items_created} создано, '
+                    f'{sync_log.items_updated} обновлено ({sync_log.items_processed} товаров)'
+                ))
+            
+            except Exception as e:
+                sync_log.status = 'error'
+                sync_log.error_message = str(e)
+                sync_log.finished_at = timezone.now()
+                sync_log.save()
+            
+                self.stdout.write(self.style.ERROR(f'Ошибка: {e}'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0002_alter_order_number_alter_product_article_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sync_type', models.CharField(choices=[('products', 'Товары'), ('orders', 'Заказы'), ('stock', 'Остатки'), ('categories', 'Категории')], max_length=20, unique=True, verbose_name='Тип синхронизации')),
+                ('watermark', models.CharField(blank=True, max_length=50, null=True, verbose_name='Метка updated')),
+                ('last_full_sync', models.DateTimeField(blank=True, null=True, verbose_name='Последняя полная синхронизация')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Состояние синхронизации',
+                'verbose_name_plural': 'Состояния синхронизации',
+            },
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='is_full',
+            field=models.BooleanField(default=True, verbose_name='Полная синхронизация'),
+        ),
+    ]
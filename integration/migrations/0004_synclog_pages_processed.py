@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0003_sync_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='pages_processed',
+            field=models.IntegerField(default=0, verbose_name='Обработано страниц'),
+        ),
+    ]
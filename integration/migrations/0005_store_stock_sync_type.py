@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0004_synclog_pages_processed'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='synclog',
+            name='sync_type',
+            field=models.CharField(choices=[('products', 'Товары'), ('orders', 'Заказы'), ('stock', 'Остатки'), ('store_stock', 'Остатки по складам'), ('categories', 'Категории')], max_length=20, verbose_name='Тип синхронизации'),
+        ),
+        migrations.AlterField(
+            model_name='syncstate',
+            name='sync_type',
+            field=models.CharField(choices=[('products', 'Товары'), ('orders', 'Заказы'), ('stock', 'Остатки'), ('store_stock', 'Остатки по складам'), ('categories', 'Категории')], max_length=20, unique=True, verbose_name='Тип синхронизации'),
+        ),
+    ]
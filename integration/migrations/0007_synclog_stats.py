@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0006_prices_sync_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='stats',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Статистика по таблицам'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0007_synclog_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Хэш данных'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='seen_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний раз получен из API'),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='items_unchanged',
+            field=models.IntegerField(default=0, verbose_name='Без изменений'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0008_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='removed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Удалён в МойСклад'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sync_generation',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True, verbose_name='Поколение синхронизации'),
+        ),
+    ]
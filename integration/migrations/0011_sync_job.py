@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0010_synclog_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(choices=[('products', 'Товары'), ('stock', 'Остатки')], max_length=20, verbose_name='Тип задания')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Параметры')),
+                ('dedup_key', models.CharField(max_length=255, verbose_name='Ключ дедупликации')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('success', 'Успешно'), ('error', 'Ошибка')], default='queued', max_length=20, verbose_name='Статус')),
+                ('worker', models.CharField(blank=True, max_length=255, null=True, verbose_name='Обработчик')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='Сообщение об ошибке')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание')),
+                ('sync_log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='integration.synclog', verbose_name='Лог синхронизации')),
+            ],
+            options={
+                'verbose_name': 'Задание синхронизации',
+                'verbose_name_plural': 'Задания синхронизации',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='integration_status_4d4e63_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='syncjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['queued', 'running'])), fields=('dedup_key',), name='unique_active_sync_job'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0011_sync_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='synclog',
+            name='status',
+            field=models.CharField(choices=[('started', 'Начата'), ('success', 'Успешно'), ('error', 'Ошибка'), ('skipped', 'Пропущена')], default='started', max_length=20, verbose_name='Статус'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0012_synclog_skipped_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='integration.synclog', verbose_name='Родительский запуск'),
+        ),
+        migrations.AlterField(
+            model_name='synclog',
+            name='sync_type',
+            field=models.CharField(choices=[('products', 'Товары'), ('orders', 'Заказы'), ('stock', 'Остатки'), ('store_stock', 'Остатки по складам'), ('warehouses', 'Склады'), ('prices', 'Цены'), ('categories', 'Категории'), ('all', 'Все данные')], max_length=20, verbose_name='Тип синхронизации'),
+        ),
+        migrations.AlterField(
+            model_name='syncstate',
+            name='sync_type',
+            field=models.CharField(choices=[('products', 'Товары'), ('orders', 'Заказы'), ('stock', 'Остатки'), ('store_stock', 'Остатки по складам'), ('warehouses', 'Склады'), ('prices', 'Цены'), ('categories', 'Категории'), ('all', 'Все данные')], max_length=20, unique=True, verbose_name='Тип синхронизации'),
+        ),
+    ]
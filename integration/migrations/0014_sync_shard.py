@@ -0,0 +1,50 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0013_synclog_parent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=100, verbose_name='Коллекция МойСклад')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Параметры')),
+                ('offset', models.IntegerField(verbose_name='Смещение')),
+                ('size', models.IntegerField(verbose_name='Размер')),
+                ('limit', models.IntegerField(verbose_name='Размер страницы')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('running', 'Выполняется'), ('done', 'Готово'), ('error', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('worker', models.CharField(blank=True, max_length=255, null=True, verbose_name='Обработчик')),
+                ('lease_until', models.DateTimeField(blank=True, null=True, verbose_name='Аренда до')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Попыток')),
+                ('pages_processed', models.IntegerField(default=0, verbose_name='Обработано страниц')),
+                ('items_processed', models.IntegerField(default=0, verbose_name='Обработано элементов')),
+                ('items_created', models.IntegerField(default=0, verbose_name='Создано элементов')),
+                ('items_updated', models.IntegerField(default=0, verbose_name='Обновлено элементов')),
+                ('items_unchanged', models.IntegerField(default=0, verbose_name='Без изменений')),
+                ('stats', models.JSONField(blank=True, default=dict, verbose_name='Статистика по таблицам')),
+                ('watermark', models.CharField(blank=True, max_length=50, null=True, verbose_name='Метка updated')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='Сообщение об ошибке')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание')),
+                ('sync_log', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='integration.synclog', verbose_name='Лог синхронизации')),
+            ],
+            options={
+                'verbose_name': 'Шард синхронизации',
+                'verbose_name_plural': 'Шарды синхронизации',
+                'ordering': ['sync_log', 'endpoint', 'offset'],
+                'indexes': [models.Index(fields=['status', 'lease_until'], name='integration_status_bebdeb_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='syncshard',
+            constraint=models.UniqueConstraint(fields=('sync_log', 'endpoint', 'offset'), name='unique_sync_shard'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0014_sync_shard'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='synclog',
+            name='sync_type',
+            field=models.CharField(choices=[('products', 'Товары'), ('orders', 'Заказы'), ('stock', 'Остатки'), ('store_stock', 'Остатки по складам'), ('warehouses', 'Склады'), ('prices', 'Цены'), ('categories', 'Категории'), ('webhooks', 'Вебхуки'), ('all', 'Все данные')], max_length=20, verbose_name='Тип синхронизации'),
+        ),
+        migrations.AlterField(
+            model_name='syncstate',
+            name='sync_type',
+            field=models.CharField(choices=[('products', 'Товары'), ('orders', 'Заказы'), ('stock', 'Остатки'), ('store_stock', 'Остатки по складам'), ('warehouses', 'Склады'), ('prices', 'Цены'), ('categories', 'Категории'), ('webhooks', 'Вебхуки'), ('all', 'Все данные')], max_length=20, unique=True, verbose_name='Тип синхронизации'),
+        ),
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('product', 'Товар'), ('customerorder', 'Заказ покупателя'), ('stock', 'Остатки')], max_length=20, verbose_name='Тип сущности')),
+                ('action', models.CharField(choices=[('CREATE', 'Создание'), ('UPDATE', 'Изменение'), ('DELETE', 'Удаление')], max_length=10, verbose_name='Действие')),
+                ('moysklad_id', models.CharField(blank=True, max_length=255, verbose_name='ID в МойСклад')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Событие')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('done', 'Обработано'), ('error', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Попыток')),
+                ('error_message', models.TextField(blank=True, null=True, verbose_name='Сообщение об ошибке')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Получено')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Обработано')),
+            ],
+            options={
+                'verbose_name': 'Событие вебхука',
+                'verbose_name_plural': 'События вебхуков',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['status', 'id'], name='integration_status_2462bd_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0015_webhook_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='external_code',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name='Внешний код'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='next_push_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Следующая попытка'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='payload',
+            field=models.JSONField(blank=True, null=True, verbose_name='Данные для отправки в МойСклад'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='push_attempts',
+            field=models.PositiveIntegerField(default=0, verbose_name='Попыток отправки'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='push_error',
+            field=models.TextField(blank=True, null=True, verbose_name='Ошибка отправки'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='push_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Ожидает отправки'), ('sent', 'Отправлен'), ('error', 'Ошибка отправки')], max_length=20, null=True, verbose_name='Статус отправки'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='moysklad_id',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name='ID в МойСклад'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['push_status', 'next_push_at'], name='integration_push_st_2fc065_idx'),
+        ),
+    ]
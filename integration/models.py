@@ -1,4 +1,7 @@
-from django.db import models
+import json
+
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 
 
 class Product(models.Model):
@@ -31,6 +34,14 @@ class Product(models.Model):
     
     raw_data = models.JSONField(blank=True, null=True, verbose_name='Полные данные из API')
     
+    # Хэш нормализованных данных МойСклад: строка перезаписывается, только если он изменился
+    content_hash = models.CharField(max_length=64, blank=True, default='', verbose_name='Хэш данных')
+    seen_at = models.DateTimeField(null=True, blank=True, verbose_name='Последний раз получен из API')
+    
+    # ID SyncLog последнего запуска, получившего товар; по нему находятся удалённые в МойСклад
+    sync_generation = models.BigIntegerField(null=True, blank=True, db_index=True, verbose_name='Поколение синхронизации')
+    removed_at = models.DateTimeField(null=True, blank=True, verbose_name='Удалён в МойСклад')
+    
     class Meta:
         verbose_name = 'Товар'
         verbose_name_plural = 'Товары'
@@ -77,7 +88,13 @@ class Order(models.Model):
         ('cancelled', 'Отменен'),
     ]
     
-    moysklad_id = models.CharField(max_length=255, unique=True, verbose_name='ID в МойСклад')
+    PUSH_STATUS_CHOICES = [
+        ('pending', 'Ожидает отправки'),
+        ('sent', 'Отправлен'),
+        ('error', 'Ошибка отправки'),
+    ]
+    
+    moysklad_id = models.CharField(max_length=255, unique=True, blank=True, null=True, verbose_name='ID в МойСклад')
     number = models.CharField(max_length=255, verbose_name='Номер заказа')
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new', verbose_name='Статус')
@@ -101,6 +118,16 @@ class Order(models.Model):
     
     raw_data = models.JSONField(blank=True, null=True, verbose_name='Полные данные из API')
     
+    # Исходящая очередь: заказ магазина сохраняется локально и отправляется в МойСклад
+    # обработчиком push_orders. external_code — ключ идемпотентности (externalCode)
+    external_code = models.CharField(max_length=255, unique=True, blank=True, null=True, verbose_name='Внешний код')
+    payload = models.JSONField(blank=True, null=True, verbose_name='Данные для отправки в МойСклад')
+    push_status = models.CharField(max_length=20, choices=PUSH_STATUS_CHOICES, blank=True, null=True,
+                                   verbose_name='Статус отправки')
+    push_attempts = models.PositiveIntegerField(default=0, verbose_name='Попыток отправки')
+    next_push_at = models.DateTimeField(blank=True, null=True, verbose_name='Следующая попытка')
+    push_error = models.TextField(blank=True, null=True, verbose_name='Ошибка отправки')
+    
     class Meta:
         verbose_name = 'Заказ'
         verbose_name_plural = 'Заказы'
@@ -108,6 +135,7 @@ class Order(models.Model):
         indexes = [
             models.Index(fields=['moysklad_id']),
             models.Index(fields=['number']),
+            models.Index(fields=['push_status', 'next_push_at']),
         ]
     
     def __str__(self):
@@ -121,13 +149,19 @@ class SyncLog(models.Model):
         ('products', 'Товары'),
         ('orders', 'Заказы'),
         ('stock', 'Остатки'),
+        ('store_stock', 'Остатки по складам'),
+        ('warehouses', 'Склады'),
+        ('prices', 'Цены'),
         ('categories', 'Категории'),
+        ('webhooks', 'Вебхуки'),
+        ('all', 'Все данные'),
     ]
     
     STATUS_CHOICES = [
         ('started', 'Начата'),
         ('success', 'Успешно'),
         ('error', 'Ошибка'),
+        ('skipped', 'Пропущена'),
     ]
     
     sync_type = models.CharField(max_length=20, choices=SYNC_TYPES, verbose_name='Тип синхронизации')
@@ -136,16 +170,302 @@ class SyncLog(models.Model):
     items_processed = models.IntegerField(default=0, verbose_name='Обработано элементов')
     items_created = models.IntegerField(default=0, verbose_name='Создано элементов')
     items_updated = models.IntegerField(default=0, verbose_name='Обновлено элементов')
+    items_unchanged = models.IntegerField(default=0, verbose_name='Без изменений')
+    
+    pages_processed = models.IntegerField(default=0, verbose_name='Обработано страниц')
+    
+    # Счётчики по каждой целевой таблице: {'products.Product': {'created': 1, ...}}
+    stats = models.JSONField(default=dict, blank=True, verbose_name='Статистика по таблицам')
+    
+    is_full = models.BooleanField(default=True, verbose_name='Полная синхронизация')
+    
+    # Запуск sync_all, в рамках которого выполнялся этот этап
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True,
+                               related_name='children', verbose_name='Родительский запуск')
+    
+    # Последняя записанная в БД страница: {'entity', 'params', 'limit', 'offset', 'page', ...}
+    checkpoint = models.JSONField(default=dict, blank=True, verbose_name='Контрольная точка')
     
     error_message = models.TextField(blank=True, null=True, verbose_name='Сообщение об ошибке')
     
     started_at = models.DateTimeField(auto_now_add=True, verbose_name='Начало')
     finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание')
     
+    CHECKPOINT_FIELDS = [
+        'checkpoint', 'pages_processed', 'items_processed', 'items_created',
+        'items_updated', 'items_unchanged', 'stats', 'is_full',
+    ]
+    
     class Meta:
         verbose_name = 'Лог синхронизации'
         verbose_name_plural = 'Логи синхронизации'
         ordering = ['-started_at']
     
+    def add_stats(self, target, **counts):
+        """Увеличение счётчиков целевой таблицы в stats"""
+        target_stats = self.stats.setdefault(target, {})
+        for name, value in counts.items():
+            target_stats[name] = target_stats.get(name, 0) + value
+    
+    def save_checkpoint(self, **checkpoint):
+        """Сохранение контрольной точки вместе с накопленными счётчиками"""
+        self.checkpoint = checkpoint
+        self.save(update_fields=self.CHECKPOINT_FIELDS)
+    
+    def finish(self, error=None):
+        """Завершение запуска: успешно или с ошибкой error"""
+        self.status = 'error' if error else 'success'
+        self.error_message = str(error) if error else None
+        self.finished_at = timezone.now()
+        self.save()
+    
+    @classmethod
+    def start(cls, sync_type, resume=False, parent=None):
+        """
+        Лог нового запуска. При resume=True продолжается последний прерванный
+        запуск этого типа с контрольной точкой: завершившийся ошибкой или
+        оставшийся в started (процесс убит), если блокировку синхронизации
+        этого типа никто не держит. Пропущенные запуски и опросы без
+        контрольной точки не учитываются.
+        """
+        if resume:
+            last = cls.get_resumable(sync_type)
+            if last:
+                last.status = 'started'
+                last.error_message = None
+                last.finished_at = None
+                last.save()
+                return last
+        return cls.objects.create(sync_type=sync_type, status='started', parent=parent)
+    
+    @classmethod
+    def skip(cls, sync_type, message, is_full=True):
+        """Лог пропущенного запуска (синхронизация этого типа уже выполняется)"""
+        return cls.objects.create(
+            sync_type=sync_type,
+            status='skipped',
+            is_full=is_full,
+            error_message=message,
+            finished_at=timezone.now(),
+        )
+    
+    @classmethod
+    def get_resumable(cls, sync_type):
+        """Прерванный запуск для resume или None"""
+        from integration.services.locks import get_sync_lock_name, is_lock_held
+        
+        last = (
+            cls.objects.filter(sync_type=sync_type, status__in=['started', 'error'])
+            .exclude(checkpoint={})
+            .order_by('-started_at')
+            .first()
+        )
+        if last is None:
+            return None
+        
+        # Запуск в started жив, пока кто-то держит блокировку синхронизации
+        if last.status == 'started' and is_lock_held(get_sync_lock_name(sync_type)):
+            return None
+        
+        # После прерванного запуска уже прошёл успешный запуск того же режима
+        finished = cls.objects.filter(
+            sync_type=sync_type, status='success', is_full=last.is_full, started_at__gt=last.started_at
+        )
+        if finished.exists():
+            return None
+        return last
+    
     def __str__(self):
         return f"{self.get_sync_type_display()} - {self.get_status_display()} ({self.started_at.strftime('%d.%m.%Y %H:%M')})"
+
+
+class SyncState(models.Model):
+    """Состояние инкрементальной синхронизации по типу данных"""
+    
+    sync_type = models.CharField(max_length=20, choices=SyncLog.SYNC_TYPES, unique=True,
+                                 verbose_name='Тип синхронизации')
+    
+    # Максимальное значение поля updated из МойСклад среди загруженных записей
+    watermark = models.CharField(max_length=50, blank=True, null=True, verbose_name='Метка updated')
+    
+    last_full_sync = models.DateTimeField(null=True, blank=True, verbose_name='Последняя полная синхронизация')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Обновлено')
+    
+    class Meta:
+        verbose_name = 'Состояние синхронизации'
+        verbose_name_plural = 'Состояния синхронизации'
+    
+    def __str__(self):
+        return f"{self.get_sync_type_display()}: {self.watermark or '—'}"
+
+
+class SyncShard(models.Model):
+    """Диапазон смещений синхронизации, который может взять обработчик на любом узле"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает'),
+        ('running', 'Выполняется'),
+        ('done', 'Готово'),
+        ('error', 'Ошибка'),
+    ]
+    
+    sync_log = models.ForeignKey(SyncLog, on_delete=models.CASCADE, related_name='shards',
+                                 verbose_name='Лог синхронизации')
+    endpoint = models.CharField(max_length=100, verbose_name='Коллекция МойСклад')
+    params = models.JSONField(default=dict, blank=True, verbose_name='Параметры')
+    
+    offset = models.IntegerField(verbose_name='Смещение')
+    size = models.IntegerField(verbose_name='Размер')
+    limit = models.IntegerField(verbose_name='Размер страницы')
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    worker = models.CharField(max_length=255, blank=True, null=True, verbose_name='Обработчик')
+    lease_until = models.DateTimeField(null=True, blank=True, verbose_name='Аренда до')
+    attempts = models.IntegerField(default=0, verbose_name='Попыток')
+    
+    pages_processed = models.IntegerField(default=0, verbose_name='Обработано страниц')
+    items_processed = models.IntegerField(default=0, verbose_name='Обработано элементов')
+    items_created = models.IntegerField(default=0, verbose_name='Создано элементов')
+    items_updated = models.IntegerField(default=0, verbose_name='Обновлено элементов')
+    items_unchanged = models.IntegerField(default=0, verbose_name='Без изменений')
+    stats = models.JSONField(default=dict, blank=True, verbose_name='Статистика по таблицам')
+    watermark = models.CharField(max_length=50, blank=True, null=True, verbose_name='Метка updated')
+    
+    error_message = models.TextField(blank=True, null=True, verbose_name='Сообщение об ошибке')
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание')
+    
+    class Meta:
+        verbose_name = 'Шард синхронизации'
+        verbose_name_plural = 'Шарды синхронизации'
+        ordering = ['sync_log', 'endpoint', 'offset']
+        indexes = [
+            models.Index(fields=['status', 'lease_until']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['sync_log', 'endpoint', 'offset'], name='unique_sync_shard'),
+        ]
+    
+    def __str__(self):
+        return f"{self.endpoint} [{self.offset}:{self.offset + self.size}] - {self.get_status_display()}"
+
+
+class SyncJob(models.Model):
+    """Задание фоновой синхронизации (очередь в БД, выполняет run_sync_worker)"""
+    
+    JOB_TYPES = [
+        ('products', 'Товары'),
+        ('stock', 'Остатки'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('queued', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('success', 'Успешно'),
+        ('error', 'Ошибка'),
+    ]
+    
+    ACTIVE_STATUSES = ['queued', 'running']
+    
+    job_type = models.CharField(max_length=20, choices=JOB_TYPES, verbose_name='Тип задания')
+    params = models.JSONField(default=dict, blank=True, verbose_name='Параметры')
+    
+    # Тип + параметры: одинаковые задания в очереди или в работе схлопываются
+    dedup_key = models.CharField(max_length=255, verbose_name='Ключ дедупликации')
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', verbose_name='Статус')
+    sync_log = models.ForeignKey(SyncLog, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='jobs', verbose_name='Лог синхронизации')
+    
+    worker = models.CharField(max_length=255, blank=True, null=True, verbose_name='Обработчик')
+    error_message = models.TextField(blank=True, null=True, verbose_name='Сообщение об ошибке')
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создано')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Начало')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание')
+    
+    class Meta:
+        verbose_name = 'Задание синхронизации'
+        verbose_name_plural = 'Задания синхронизации'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_sync_job',
+            ),
+        ]
+    
+    @classmethod
+    def enqueue(cls, job_type, **params):
+        """
+        Постановка задания в очередь, возвращает (задание, создано).
+        Если такое же задание уже ждёт или выполняется, возвращается оно.
+        """
+        dedup_key = f"{job_type}:{json.dumps(params, sort_keys=True)}"
+        while True:
+            job = cls.objects.filter(dedup_key=dedup_key, status__in=cls.ACTIVE_STATUSES).first()
+            if job:
+                return job, False
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(job_type=job_type, params=params, dedup_key=dedup_key), True
+            except IntegrityError:
+                # Параллельный запрос успел создать такое же задание
+                continue
+    
+    def __str__(self):
+        return f"{self.get_job_type_display()} #{self.pk} - {self.get_status_display()}"
+
+
+class WebhookEvent(models.Model):
+    """Событие вебхука МойСклад (очередь в БД, разбирает process_webhooks)"""
+    
+    ENTITY_TYPES = [
+        ('product', 'Товар'),
+        ('customerorder', 'Заказ покупателя'),
+        ('stock', 'Остатки'),
+    ]
+    
+    ACTIONS = [
+        ('CREATE', 'Создание'),
+        ('UPDATE', 'Изменение'),
+        ('DELETE', 'Удаление'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает'),
+        ('processing', 'Обрабатывается'),
+        ('done', 'Обработано'),
+        ('error', 'Ошибка'),
+    ]
+    
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPES, verbose_name='Тип сущности')
+    action = models.CharField(max_length=10, choices=ACTIONS, verbose_name='Действие')
+    moysklad_id = models.CharField(max_length=255, blank=True, verbose_name='ID в МойСклад')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Событие')
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    attempts = models.IntegerField(default=0, verbose_name='Попыток')
+    error_message = models.TextField(blank=True, null=True, verbose_name='Сообщение об ошибке')
+    
+    # Для processing — срок аренды обработчиком, для pending — не раньше какого времени брать
+    next_attempt_at = models.DateTimeField(null=True, blank=True, verbose_name='Следующая попытка')
+    
+    received_at = models.DateTimeField(auto_now_add=True, verbose_name='Получено')
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name='Обработано')
+    
+    class Meta:
+        verbose_name = 'Событие вебхука'
+        verbose_name_plural = 'События вебхуков'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.entity_type} {self.action} {self.moysklad_id}"
@@ -0,0 +1,16 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from .services.json_codec import loads, orjson, use_orjson
+
+
+class FastJSONParser(JSONParser):
+    """JSON-парсер на orjson (при MOYSKLAD_JSON_BACKEND='orjson'), иначе стандартный DRF"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not use_orjson():
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
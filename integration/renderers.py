@@ -0,0 +1,16 @@
+from rest_framework.renderers import JSONRenderer
+from .services.json_codec import dumps, use_orjson
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson (при MOYSKLAD_JSON_BACKEND='orjson'), иначе стандартный DRF"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not use_orjson():
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return dumps(data, indent=bool(indent))
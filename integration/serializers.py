@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Product, ProductCategory, Order, SyncLog
+from .models import Product, ProductCategory, Order, SyncLog, SyncJob
 
 class ProductSerializer(serializers.ModelSerializer):
     class Meta:
@@ -15,8 +15,23 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = '__all__'
+        read_only_fields = ['push_status', 'push_attempts', 'next_push_at', 'push_error']
+
+    def validate_moysklad_id(self, value):
+        # Пустая строка вместо NULL нарушила бы уникальность и очередь отправки
+        return value or None
+
+    def validate_external_code(self, value):
+        return value or None
 
 class SyncLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = SyncLog
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class SyncJobSerializer(serializers.ModelSerializer):
+    sync_log = SyncLogSerializer(read_only=True)
+
+    class Meta:
+        model = SyncJob
+        exclude = ['dedup_key']
@@ -0,0 +1,51 @@
+from django.conf import settings
+from integration.services.json_codec import use_streaming
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def iter_checkpointed(api, sync_log, endpoint, params=None, workers=None, checkpoint=None, state=None):
+    """
+    Постраничный обход endpoint с контрольными точками в sync_log.
+
+    Отдаёт (номер страницы, строки). Контрольная точка сохраняется, когда
+    вызывающий код запрашивает следующую страницу, то есть после записи
+    предыдущей. При потоковом разборе страница API приходит частями
+    (с одним номером), и точка сохраняется после записи последней части,
+    поэтому смещение в ней всегда на границе страницы. state — словарь, который вызывающий код дополняет по ходу
+    обхода (например, метка updated), он сохраняется в точке целиком.
+
+    checkpoint — точка прерванного запуска: обход той же коллекции
+    продолжается с неё с прежними параметрами, state восстанавливается.
+    """
+    limit = settings.MOYSKLAD_PAGE_SIZE
+    offset = 0
+    page = 0
+    state = {} if state is None else state
+
+    if checkpoint and checkpoint.get('entity') == endpoint:
+        params = checkpoint['params']
+        limit = checkpoint['limit']
+        offset = checkpoint['offset']
+        page = checkpoint['page']
+        state.update(checkpoint.get('state', {}))
+        logger.info(f"{endpoint}: продолжение с контрольной точки, страница {page + 1}")
+
+    stream = use_streaming()
+    pages = api.iter_pages(endpoint, limit=limit, params=params, workers=workers, offset=offset, stream=stream)
+    written = 0
+    for rows in pages:
+        yield page + 1, rows
+
+        written += len(rows)
+        if stream and written < limit:
+            continue
+
+        written = 0
+        page += 1
+        offset += limit
+        sync_log.save_checkpoint(
+            entity=endpoint, params=params or {}, limit=limit,
+            offset=offset, page=page, state=state,
+        )
@@ -0,0 +1,119 @@
+import json
+from datetime import date, datetime
+from io import StringIO
+
+from django.conf import settings
+from django.db import connection, transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def use_copy_load():
+    """Включена ли загрузка через COPY (только PostgreSQL)"""
+    if settings.MOYSKLAD_SYNC_LOAD_STRATEGY != 'copy':
+        return False
+    if connection.vendor != 'postgresql':
+        logger.warning("MOYSKLAD_SYNC_LOAD_STRATEGY=copy поддерживается только PostgreSQL, используется ORM")
+        return False
+    return True
+
+
+def copy_upsert(model, objects, unique_fields, update_fields, compare_fields, touch_fields=()):
+    """
+    Загрузка экземпляров model через временную таблицу.
+
+    Строки копируются через COPY во временную (не пишущую WAL) таблицу, затем
+    одним INSERT ... ON CONFLICT применяются к целевой: новые вставляются,
+    существующие обновляются только если отличается хотя бы одно из
+    compare_fields. У неизменённых строк touch_fields обновляются одним UPDATE
+    перед вставкой, так что каждая строка переписывается не больше одного раза.
+    Возвращает (вставлено, обновлено, без изменений).
+    """
+    if not objects:
+        return 0, 0, 0
+
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    columns = [field.column for field in fields]
+    table = model._meta.db_table
+    stage = f'stage_{table}'
+    qn = connection.ops.quote_name
+
+    def column(name):
+        return qn(model._meta.get_field(name).column)
+
+    column_list = ', '.join(qn(name) for name in columns)
+    conflict = ', '.join(column(name) for name in unique_fields)
+    updates = ', '.join(f'{column(name)} = EXCLUDED.{column(name)}' for name in update_fields)
+    distinct = ' OR '.join(
+        f'{qn(table)}.{column(name)} IS DISTINCT FROM EXCLUDED.{column(name)}'
+        for name in compare_fields
+    )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE IF NOT EXISTS {qn(stage)} ON COMMIT DROP AS '
+            f'SELECT {column_list} FROM {qn(table)} WITH NO DATA'
+        )
+        cursor.execute(f'TRUNCATE {qn(stage)}')
+        _copy_rows(cursor, stage, columns, _iter_rows(objects, fields))
+
+        # До upsert: иначе под условие попадут и только что записанные строки
+        if touch_fields:
+            touches = ', '.join(f'{column(name)} = s.{column(name)}' for name in touch_fields)
+            keys = ' AND '.join(f't.{column(name)} = s.{column(name)}' for name in unique_fields)
+            same = ' AND '.join(
+                f't.{column(name)} IS NOT DISTINCT FROM s.{column(name)}' for name in compare_fields
+            )
+            cursor.execute(
+                f'UPDATE {qn(table)} t SET {touches} FROM {qn(stage)} s WHERE {keys} AND {same}'
+            )
+
+        cursor.execute(
+            f'INSERT INTO {qn(table)} ({column_list}) '
+            f'SELECT {column_list} FROM {qn(stage)} '
+            f'ON CONFLICT ({conflict}) DO UPDATE SET {updates} WHERE {distinct} '
+            f'RETURNING (xmax = 0)'
+        )
+        results = [inserted for inserted, in cursor.fetchall()]
+
+    inserted = sum(results)
+    updated = len(results) - inserted
+    return inserted, updated, len(objects) - len(results)
+
+
+def _iter_rows(objects, fields):
+    for obj in objects:
+        yield [field.pre_save(obj, add=True) for field in fields]
+
+
+def _copy_rows(cursor, table, columns, rows):
+    """COPY ... FROM STDIN в текстовом формате (psycopg2 и psycopg 3)"""
+    qn = connection.ops.quote_name
+    sql = f'COPY {qn(table)} ({", ".join(qn(column) for column in columns)}) FROM STDIN'
+    data = ''.join('\t'.join(_copy_value(value) for value in row) + '\n' for row in rows)
+
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(sql, StringIO(data))
+    else:
+        with cursor.copy(sql) as copy:
+            copy.write(data)
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return (
+        value.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
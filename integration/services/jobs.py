@@ -0,0 +1,133 @@
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from integration.models import SyncJob, SyncLog
+from integration.services.locks import advisory_lock, get_sync_lock_name
+from integration.services.moysklad_api import MoySkladAPI
+from integration.services.orchestrator import run_all
+from integration.services.pipeline import CatalogPipeline
+from integration.services.stock_sync import sync_current_stock, sync_stock
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def run_products_job(api, sync_log, params):
+    """Товары, PIM-карточки и цены (full, with_stock, resume)"""
+    CatalogPipeline(api, sync_log).run(
+        full=params.get('full') or None,
+        stock=bool(params.get('with_stock')),
+        resume=bool(params.get('resume')),
+    )
+
+
+def run_stock_job(api, sync_log, params):
+    """Остатки (current, full, resume)"""
+    if params.get('current'):
+        sync_current_stock(api, sync_log, full=bool(params.get('full')))
+    else:
+        sync_stock(api, sync_log, checkpoint=sync_log.checkpoint if params.get('resume') else None)
+
+
+JOB_RUNNERS = {
+    'products': run_products_job,
+    'stock': run_stock_job,
+    'all': run_all,
+}
+
+
+def get_worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_job(worker):
+    """
+    Захват самого старого задания из очереди. SKIP LOCKED позволяет
+    нескольким обработчикам разбирать очередь без блокировок друг друга.
+    """
+    with transaction.atomic():
+        job = (
+            SyncJob.objects.select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = 'running'
+        job.worker = worker
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'worker', 'started_at'])
+
+    return job
+
+
+def execute_sync(sync_log, params):
+    """Выполнение синхронизации типа sync_log.sync_type с записью результата в sync_log"""
+    try:
+        JOB_RUNNERS[sync_log.sync_type](MoySkladAPI(), sync_log, params)
+        sync_log.finish()
+
+    except Exception as e:
+        logger.error(f"Ошибка синхронизации {sync_log.sync_type}: {e}")
+        sync_log.finish(error=e)
+
+    return sync_log
+
+
+def run_job(job):
+    """
+    Выполнение задания. Если такая же синхронизация идёт в планировщике
+    или на другом узле, задание дожидается её окончания.
+    """
+    with advisory_lock(get_sync_lock_name(job.job_type), wait=True):
+        sync_log = SyncLog.start(job.job_type, resume=bool(job.params.get('resume')))
+        job.sync_log = sync_log
+        job.save(update_fields=['sync_log'])
+
+        execute_sync(sync_log, job.params)
+
+    job.status = sync_log.status
+    job.error_message = sync_log.error_message
+    job.finished_at = sync_log.finished_at
+    job.save(update_fields=['status', 'error_message', 'finished_at'])
+
+    return job
+
+
+def expire_stale_jobs():
+    """
+    Завершение с ошибкой заданий, которые числятся выполняющимися дольше
+    MOYSKLAD_SYNC_JOB_TIMEOUT_MINUTES, но блокировку синхронизации их типа
+    никто не держит (обработчик упал или был убит), чтобы такие же задания
+    снова можно было поставить. Задание, которое ещё выполняется, держит
+    блокировку и не трогается, сколько бы оно ни длилось. Вместе с заданием
+    с ошибкой завершается и его лог синхронизации.
+    """
+    deadline = timezone.now() - timedelta(minutes=settings.MOYSKLAD_SYNC_JOB_TIMEOUT_MINUTES)
+    error = 'Обработчик задания не отвечает'
+    expired = 0
+
+    jobs = SyncJob.objects.filter(status='running', started_at__lt=deadline).select_related('sync_log')
+    for job in jobs:
+        with advisory_lock(get_sync_lock_name(job.job_type)) as acquired:
+            if not acquired:
+                continue
+
+            with transaction.atomic():
+                updated = SyncJob.objects.filter(pk=job.pk, status='running').update(
+                    status='error', error_message=error, finished_at=timezone.now(),
+                )
+                if updated and job.sync_log and job.sync_log.status == 'started':
+                    job.sync_log.finish(error=error)
+
+            if updated:
+                logger.warning(f"Задание {job.pk} ({job.job_type}) на {job.worker} не отвечает, завершено с ошибкой")
+            expired += updated
+
+    return expired
@@ -0,0 +1,77 @@
+import json
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_warned = False
+
+
+def use_orjson():
+    """Включён ли быстрый JSON (MOYSKLAD_JSON_BACKEND='orjson' и пакет установлен)"""
+    global _warned
+    if settings.MOYSKLAD_JSON_BACKEND != 'orjson':
+        return False
+    if orjson is None:
+        if not _warned:
+            logger.warning("MOYSKLAD_JSON_BACKEND=orjson, но пакет orjson не установлен, используется json")
+            _warned = True
+        return False
+    return True
+
+
+def use_streaming():
+    """Включён ли потоковый разбор страниц МойСклад (MOYSKLAD_STREAM_JSON и пакет ijson)"""
+    if not settings.MOYSKLAD_STREAM_JSON:
+        return False
+    if ijson is None:
+        logger.warning("MOYSKLAD_STREAM_JSON включён, но пакет ijson не установлен")
+        return False
+    return True
+
+
+def iter_items(stream, prefix):
+    """Инкрементальный разбор элементов prefix (например 'rows.item') из файлового объекта"""
+    # Числа как float, как у json.loads: иначе ijson отдаёт Decimal
+    return ijson.items(stream, prefix, use_float=True)
+
+
+_encoder = JSONEncoder()
+
+
+def default(obj):
+    """Типы, которые orjson не сериализует сам (Decimal, ленивые строки, datetime) — как в DRF"""
+    return _encoder.default(obj)
+
+
+def loads(data):
+    """Разбор JSON из bytes или str"""
+    if use_orjson():
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(data, indent=False):
+    """Сериализация в UTF-8 bytes; даты, Decimal и UUID — как у JSONRenderer DRF"""
+    if use_orjson():
+        # Нестроковые ключи (int, UUID) приводятся к строкам, как у json.dumps
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=default, option=option)
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, indent=2 if indent else None,
+        separators=None if indent else (',', ':'),
+    ).encode()
@@ -0,0 +1,93 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from django.db import connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Без PostgreSQL синхронизации разводятся только внутри процесса; блокировка
+# повторно входима, как и pg_advisory_lock в пределах одного соединения
+_local_locks = {}
+_local_locks_lock = threading.Lock()
+
+
+def get_lock_key(name):
+    """Ключ advisory lock (bigint) из имени блокировки"""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], 'big', signed=True)
+
+
+# Типы синхронизации, которые пишут одни и те же таблицы, делят одну блокировку
+SYNC_LOCK_GROUPS = {
+    'store_stock': 'stock',
+}
+
+
+def get_sync_lock_name(sync_type):
+    """Имя блокировки: одновременно выполняется только одна синхронизация каждого типа"""
+    return f'moysklad-sync:{SYNC_LOCK_GROUPS.get(sync_type, sync_type)}'
+
+
+def _get_local_lock(name):
+    with _local_locks_lock:
+        return _local_locks.setdefault(name, threading.RLock())
+
+
+def is_lock_held(name):
+    """
+    Держит ли блокировку name кто-то другой (другое соединение PostgreSQL
+    или, без PostgreSQL, другой поток). Собственная блокировка не считается.
+    """
+    if connection.vendor != 'postgresql':
+        lock = _get_local_lock(name)
+        if not lock.acquire(blocking=False):
+            return True
+        lock.release()
+        return False
+
+    # Ключ bigint хранится в pg_locks старшими (classid) и младшими (objid) 32 битами
+    key = get_lock_key(name) & 0xFFFFFFFFFFFFFFFF
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND granted "
+            "AND classid = %s::bigint::oid AND objid = %s::bigint::oid AND objsubid = 1 "
+            "AND pid <> pg_backend_pid())",
+            [key >> 32, key & 0xFFFFFFFF],
+        )
+        return cursor.fetchone()[0]
+
+
+@contextmanager
+def advisory_lock(name, wait=False):
+    """
+    Межпроцессная блокировка pg_advisory_lock на соединении текущего потока,
+    отдаёт True, если блокировка получена. wait=False — не ждать, если её
+    держит другой процесс или узел. На других СУБД блокировка действует
+    только в пределах процесса.
+    """
+    if connection.vendor != 'postgresql':
+        lock = _get_local_lock(name)
+        acquired = lock.acquire(blocking=wait)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+        return
+
+    key = get_lock_key(name)
+    with connection.cursor() as cursor:
+        if wait:
+            cursor.execute('SELECT pg_advisory_lock(%s)', [key])
+            acquired = True
+        else:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [key])
+            acquired = cursor.fetchone()[0]
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [key])
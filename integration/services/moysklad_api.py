@@ -1,17 +1,124 @@
+import os
+import random
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.connection import HTTPConnection
 from django.conf import settings
+from .json_codec import dumps, iter_items, loads, use_streaming
+from .rate_limit import RateLimiter
+from .utils import chunks
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """HTTP-адаптер с TCP keep-alive для долгоживущих соединений"""
+
+    def __init__(self, *args, keep_alive=True, **kwargs):
+        self.keep_alive = keep_alive
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keep_alive:
+            kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+RETRY_STATUSES = {429, 502, 503, 504}
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+_session = None
+_rate_limiter = None
+_request_slots = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Общая для процесса HTTP-сессия с пулом соединений к МойСклад"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                adapter = KeepAliveHTTPAdapter(
+                    pool_connections=settings.MOYSKLAD_POOL_CONNECTIONS,
+                    pool_maxsize=settings.MOYSKLAD_POOL_MAXSIZE,
+                    pool_block=True,
+                    keep_alive=settings.MOYSKLAD_KEEP_ALIVE,
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                if not settings.MOYSKLAD_KEEP_ALIVE:
+                    session.headers['Connection'] = 'close'
+                _session = session
+    return _session
+
+
+def get_rate_limiter():
+    """Общий для процесса ограничитель частоты запросов к МойСклад"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _session_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(
+                    settings.MOYSKLAD_RATE_LIMIT, settings.MOYSKLAD_RATE_PERIOD
+                )
+    return _rate_limiter
+
+
+def get_request_slots():
+    """
+    Общий для процесса семафор одновременных запросов к МойСклад: RateLimiter
+    ограничивает частоту, а не число запросов в полёте, а МойСклад допускает
+    не больше MOYSKLAD_MAX_PARALLEL_REQUESTS параллельных запросов на аккаунт
+    (сколько бы синхронизаций и потоков ни работало одновременно).
+    """
+    global _request_slots
+    if _request_slots is None:
+        with _session_lock:
+            if _request_slots is None:
+                _request_slots = threading.BoundedSemaphore(settings.MOYSKLAD_MAX_PARALLEL_REQUESTS)
+    return _request_slots
+
+
+def _reset_session():
+    """Сброс сессии в дочернем процессе: сокеты родителя использовать нельзя"""
+    global _session, _rate_limiter, _request_slots, _session_lock
+    _session = None
+    _rate_limiter = None
+    _request_slots = None
+    _session_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_session)
+
+
 class MoySkladAPI:
     """Класс для работы с API МойСклад"""
 
     def __init__(self):
         self.base_url = settings.MOYSKLAD_API_URL
         self.auth = self._get_auth()
+        self.session = get_session()
+        self.rate_limiter = get_rate_limiter()
+        self.request_slots = get_request_slots()
+        self.timeout = (settings.MOYSKLAD_CONNECT_TIMEOUT, settings.MOYSKLAD_READ_TIMEOUT)
 
     def _get_auth(self):
         """Получение аутентификации"""
@@ -22,22 +129,94 @@ class MoySkladAPI:
 
     def _make_request(self, method, endpoint, **kwargs):
         """Базовый метод для выполнения запросов"""
-        url = f"{self.base_url}/{endpoint}"
-
         try:
-            if isinstance(self.auth, dict):
-                kwargs['headers'] = {**kwargs.get('headers', {}), **self.auth}
-                response = requests.request(method, url, **kwargs)
-            else:
-                response = requests.request(method, url, auth=self.auth, **kwargs)
-
+            response = self._send(method, endpoint, **kwargs)
             response.raise_for_status()
-            return response.json()
+            return loads(response.content)
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Ошибка при запросе к МойСклад API: {e}")
             raise
 
+    def _send(self, method, endpoint, **kwargs):
+        """
+        Отправка запроса с учётом лимитов МойСклад.
+
+        Перед каждой попыткой берётся токен из общего для процесса RateLimiter,
+        временные ошибки (429, 502, 503, 504, обрывы соединения) повторяются
+        с экспоненциальной задержкой и джиттером. Неидемпотентный POST
+        повторяется только если запрос заведомо не был обработан.
+
+        На время запроса занимается место в общем семафоре get_request_slots().
+        Для stream=True тело читается уже после возврата, поэтому место
+        занимает вызывающий код (_stream_page) на всё чтение ответа.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        kwargs.setdefault('timeout', self.timeout)
+        if isinstance(self.auth, dict):
+            kwargs['headers'] = {**kwargs.get('headers', {}), **self.auth}
+        else:
+            kwargs['auth'] = self.auth
+
+        max_retries = settings.MOYSKLAD_MAX_RETRIES
+        idempotent = method.upper() != 'POST'
+
+        for attempt in range(max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                if kwargs.get('stream'):
+                    response = self.session.request(method, url, **kwargs)
+                else:
+                    with self.request_slots:
+                        response = self.session.request(method, url, **kwargs)
+            except RETRY_EXCEPTIONS as e:
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not retryable or attempt == max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"МойСклад: {e}, повтор через {delay:.1f} с")
+                time.sleep(delay)
+                continue
+
+            self.rate_limiter.update(response.headers)
+
+            retryable = response.status_code == 429 or (
+                idempotent and response.status_code in RETRY_STATUSES
+            )
+            if not retryable or attempt == max_retries:
+                return response
+
+            delay = self._retry_after(response) or self._backoff(attempt)
+            logger.warning(
+                f"МойСклад ответил {response.status_code}, повтор через {delay:.1f} с"
+            )
+            response.close()
+            if response.status_code == 429:
+                # Пауза общая для всех потоков: следующий acquire() дождётся её окончания
+                self.rate_limiter.pause(delay)
+            else:
+                time.sleep(delay)
+
+    @staticmethod
+    def _backoff(attempt):
+        """Экспоненциальная задержка с полным джиттером"""
+        cap = min(settings.MOYSKLAD_RETRY_MAX_DELAY, settings.MOYSKLAD_RETRY_BASE_DELAY * 2 ** attempt)
+        return random.uniform(0, cap)
+
+    @staticmethod
+    def _retry_after(response):
+        """Задержка из заголовков ответа, в секундах"""
+        value = response.headers.get('X-Lognex-Retry-After') or response.headers.get('X-Lognex-Reset')
+        if value:
+            try:
+                return int(value) / 1000
+            except ValueError:
+                pass
+        value = response.headers.get('Retry-After')
+        if value and value.isdigit():
+            return float(value)
+        return None
+
     def get_products(self, limit=100, offset=0):
         """Получение списка товаров"""
         params = {
@@ -58,6 +237,14 @@ class MoySkladAPI:
         """Обновление товара"""
         return self._make_request('PUT', f'entity/product/{product_id}', json=data)
 
+    def create_products(self, items):
+        """Массовое создание товаров, см. post_batch"""
+        return self.post_batch('entity/product', items)
+
+    def update_products(self, items):
+        """Массовое обновление товаров: у каждого элемента 'id' или 'meta', см. post_batch"""
+        return self.post_batch('entity/product', [self._with_meta('product', item) for item in items])
+
     def get_stock(self, limit=100, offset=0):
         """Получение остатков товаров"""
         params = {
@@ -66,6 +253,45 @@ class MoySkladAPI:
         }
         return self._make_request('GET', 'report/stock/all', params=params)
 
+    def get_stock_by_store(self, limit=100, offset=0):
+        """Получение остатков товаров в разрезе складов"""
+        params = {
+            'limit': limit,
+            'offset': offset
+        }
+        return self._make_request('GET', 'report/stock/bystore', params=params)
+
+    def get_stores(self, limit=100, offset=0):
+        """Получение списка складов"""
+        params = {
+            'limit': limit,
+            'offset': offset
+        }
+        return self._make_request('GET', 'entity/store', params=params)
+
+    def get_price_types(self):
+        """Получение списка типов цен"""
+        return self._make_request('GET', 'context/companysettings/pricetype')
+
+    def get_current_stock(self, stock_type='stock', changed_since=None, store_id=None):
+        """
+        Быстрый отчёт о текущих остатках (report/stock/all/current).
+
+        Возвращает список {'assortmentId', <stock_type>} без
+        пагинации. changed_since — строка 'YYYY-MM-DD HH:MM:SS' во времени
+        аккаунта МойСклад, тогда в ответ попадут только изменившиеся позиции.
+        """
+        params = {
+            'stockType': stock_type,
+            'include': 'zeroLines',
+        }
+        if changed_since:
+            params['changedSince'] = changed_since
+        if store_id:
+            params['filter'] = f'storeId={store_id}'
+
+        return self._make_request('GET', 'report/stock/all/current', params=params)
+
     def get_orders(self, limit=100, offset=0):
         """Получение списка заказов"""
         params = {
@@ -78,6 +304,10 @@ class MoySkladAPI:
         """Создание заказа"""
         return self._make_request('POST', 'entity/customerorder', json=data)
 
+    def create_orders(self, items):
+        """Массовое создание заказов покупателей, см. post_batch"""
+        return self.post_batch('entity/customerorder', items)
+
     def get_counterparties(self, limit=100, offset=0):
         """Получение списка контрагентов"""
         params = {
@@ -86,24 +316,225 @@ class MoySkladAPI:
         }
         return self._make_request('GET', 'entity/counterparty', params=params)
 
-    def sync_all_products(self):
-        """Синхронизация всех товаров"""
-        all_products = []
-        offset = 0
-        limit = 100
+    def post_batch(self, endpoint, items):
+        """
+        Массовое создание и обновление: элементы отправляются массивами по
+        MOYSKLAD_BATCH_POST_SIZE (МойСклад принимает до 1000 за запрос).
+        Элементы с meta обновляются, без meta — создаются.
+
+        Возвращает список (элемент, ответ, ошибки) в порядке items: для успешно
+        записанных ошибки — None, для отклонённых ответ — None, а ошибки —
+        список errors МойСклад. Если МойСклад отклоняет запрос целиком (4xx,
+        например, из-за одного некорректного элемента), пачка делится пополам
+        и отправляется заново, пока ошибка не будет отнесена к отдельным
+        элементам; 5xx, 401/403 и исчерпанные повторы 429 выбрасываются
+        как исключение.
+        """
+        results = []
+        for batch in chunks(items, settings.MOYSKLAD_BATCH_POST_SIZE):
+            results.extend(self._post_chunk(endpoint, batch))
+
+        failed = sum(1 for _, _, errors in results if errors)
+        if failed:
+            logger.warning(f"{endpoint}: {failed} из {len(items)} элементов отклонены МойСклад")
+
+        return results
+
+    def _post_chunk(self, endpoint, batch):
+        response = self._send(
+            'POST', endpoint,
+            data=dumps(batch),
+            headers={'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'},
+        )
+        try:
+            body = loads(response.content)
+        except ValueError:
+            body = None
+
+        # Ответ на массив — массив той же длины, на месте отклонённых элементов {errors: [...]}
+        if isinstance(body, list) and len(body) == len(batch):
+            return [
+                (item, None, result['errors']) if 'errors' in result else (item, result, None)
+                for item, result in zip(batch, body)
+            ]
+
+        if response.status_code >= 500 or response.status_code in (401, 403, 429) or body is None:
+            try:
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Ошибка при запросе к МойСклад API: {e}")
+                raise
+            raise ValueError(f"{endpoint}: неожиданный ответ МойСклад на массовый запрос")
+
+        # Запрос отклонён целиком: делением пачки находим элементы, из-за которых
+        if len(batch) > 1:
+            middle = len(batch) // 2
+            return self._post_chunk(endpoint, batch[:middle]) + self._post_chunk(endpoint, batch[middle:])
+
+        errors = body.get('errors') if isinstance(body, dict) else None
+        errors = errors or [{'error': f'HTTP {response.status_code}'}]
+        return [(item, None, errors) for item in batch]
+
+    def _with_meta(self, entity_type, item):
+        """Элемент для массового обновления: meta вместо id"""
+        if 'meta' in item:
+            return item
+        item = dict(item)
+        moysklad_id = item.pop('id')
+        item['meta'] = {
+            'href': f"{self.base_url}/entity/{entity_type}/{moysklad_id}",
+            'type': entity_type,
+            'mediaType': 'application/json',
+        }
+        return item
+
+    def iter_pages(self, endpoint, limit=None, params=None, workers=None, offset=0, end=None, stream=None):
+        """
+        Постраничный обход коллекции: отдаёт строки каждой страницы по мере загрузки.
+
+        Первая страница (со смещения offset) запрашивается сразу, по её meta.size
+        остальные смещения загружаются параллельно (не более workers запросов
+        одновременно), страницы отдаются строго по порядку. end — смещение,
+        на котором обход останавливается (диапазон шарда).
 
-        while True:
-            response = self.get_products(limit=limit, offset=offset)
-            products = response.get('rows', [])
+        stream=True (по умолчанию MOYSKLAD_STREAM_JSON) — страницы загружаются
+        последовательно и разбираются из ответа по мере чтения, каждая отдаётся
+        частями по MOYSKLAD_SYNC_BATCH_SIZE строк, так что в памяти не бывает
+        ни текста ответа, ни всех строк страницы. Часть не выходит за границу
+        страницы, неполной бывает только последняя часть страницы.
+        """
+        limit = limit or settings.MOYSKLAD_PAGE_SIZE
+        workers = settings.MOYSKLAD_MAX_WORKERS if workers is None else workers
 
-            if not products:
+        if use_streaming() if stream is None else stream:
+            yield from self._iter_stream_batches(endpoint, limit, params, offset, end)
+            return
+
+        first = self._get_page(endpoint, limit, offset, params)
+        rows = first.get('rows', [])
+        if not rows:
+            return
+        yield rows
+
+        size = first.get('meta', {}).get('size')
+        if end is not None:
+            size = end if size is None else min(size, end)
+        if size is None or workers <= 1:
+            yield from self._iter_pages_sequential(
+                endpoint, limit, offset + limit, params, len(rows), size
+            )
+            return
+
+        offsets = iter(range(offset + limit, size, limit))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='moysklad')
+        try:
+            in_flight = deque(
+                executor.submit(self._get_page, endpoint, limit, offset, params)
+                for offset in islice(offsets, workers)
+            )
+            while in_flight:
+                response = in_flight.popleft().result()
+                for offset in islice(offsets, 1):
+                    in_flight.append(executor.submit(self._get_page, endpoint, limit, offset, params))
+
+                rows = response.get('rows', [])
+                if rows:
+                    yield rows
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def iter_rows(self, endpoint, limit=None, params=None, offset=0, end=None):
+        """
+        Потоковый обход коллекции по одной строке.
+
+        Тело ответа (gzip) разбирается инкрементально прямо из сокета, поэтому
+        в памяти нет ни текста страницы, ни дерева всех её строк. Страницы
+        загружаются последовательно, пока очередная не окажется неполной.
+        """
+        limit = limit or settings.MOYSKLAD_PAGE_SIZE
+        while end is None or offset < end:
+            count = 0
+            for row in self._stream_page(endpoint, limit, offset, params):
+                count += 1
+                yield row
+
+            if count < limit:
                 break
+            offset += limit
 
-            all_products.extend(products)
+    def _iter_stream_batches(self, endpoint, limit, params, offset, end):
+        """Потоковый обход: строки каждой страницы частями по MOYSKLAD_SYNC_BATCH_SIZE"""
+        batch_size = min(limit, settings.MOYSKLAD_SYNC_BATCH_SIZE)
+        while end is None or offset < end:
+            rows = self._stream_page(endpoint, limit, offset, params)
+            count = 0
+            for batch in iter(lambda: list(islice(rows, batch_size)), []):
+                count += len(batch)
+                yield batch
+
+            if count < limit:
+                break
             offset += limit
 
-            # Проверка на последнюю страницу
-            if len(products) < limit:
+    def _stream_page(self, endpoint, limit, offset, params=None):
+        """Строки одной страницы, разбираемые по мере чтения ответа"""
+        with self.request_slots:
+            response = self._send(
+                'GET', endpoint,
+                params={**(params or {}), 'limit': limit, 'offset': offset},
+                headers={'Accept-Encoding': 'gzip'},
+                stream=True,
+            )
+            try:
+                try:
+                    response.raise_for_status()
+                except requests.exceptions.RequestException as e:
+                    logger.error(f"Ошибка при запросе к МойСклад API: {e}")
+                    raise
+
+                response.raw.decode_content = True
+                yield from iter_items(response.raw, 'rows.item')
+            finally:
+                response.close()
+
+    def get_size(self, endpoint, params=None):
+        """Число элементов коллекции (meta.size) по одному минимальному запросу"""
+        return self._get_page(endpoint, 1, 0, params).get('meta', {}).get('size', 0)
+
+    def _iter_pages_sequential(self, endpoint, limit, offset, params, last_count, size):
+        """Последовательная загрузка страниц, начиная с offset"""
+        while last_count >= limit and (size is None or offset < size):
+            response = self._get_page(endpoint, limit, offset, params)
+            rows = response.get('rows', [])
+
+            if not rows:
                 break
 
-        return all_products
\ No newline at end of file
+            yield rows
+            offset += limit
+            last_count = len(rows)
+
+    def _get_page(self, endpoint, limit, offset, params=None):
+        """Загрузка одной страницы коллекции"""
+        return self._make_request(
+            'GET', endpoint, params={**(params or {}), 'limit': limit, 'offset': offset}
+        )
+
+    def iter_by_ids(self, endpoint, ids, workers=1):
+        """Строки коллекции с указанными ID"""
+        return self.iter_by_field(endpoint, 'id', ids, workers=workers)
+
+    def iter_by_field(self, endpoint, field, values, workers=1):
+        """Строки коллекции, у которых field равно одному из values (фильтр f=a;f=b — «или»)"""
+        params = {'filter': ';'.join(f'{field}={value}' for value in values)}
+        for rows in self.iter_pages(endpoint, params=params, workers=workers):
+            yield from rows
+
+    def iter_products(self, limit=None, workers=None):
+        """Потоковый обход всех товаров"""
+        for rows in self.iter_pages('entity/product', limit=limit, workers=workers):
+            yield from rows
+
+    def sync_all_products(self):
+        """Синхронизация всех товаров (весь каталог в памяти, см. iter_products)"""
+        return list(self.iter_products())
@@ -0,0 +1,128 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from inventory.models import Warehouse
+from integration.models import SyncLog
+from integration.services.locks import advisory_lock, get_sync_lock_name
+from integration.services.pipeline import CatalogPipeline
+from integration.services.warehouse_sync import sync_store_stock, sync_warehouses
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def run_products_stage(api, sync_log, params):
+    """Товары, PIM-карточки и цены за один проход entity/product"""
+    CatalogPipeline(api, sync_log, workers=params['workers']).run(full=params.get('full') or None)
+
+
+def run_warehouses_stage(api, sync_log, params):
+    warehouse_ids = sync_warehouses(api)
+    sync_log.items_processed = len(warehouse_ids)
+
+
+def run_store_stock_stage(api, sync_log, params):
+    sync_store_stock(
+        api, sync_log,
+        workers=params['workers'],
+        warehouse_ids=dict(Warehouse.objects.values_list('moysklad_id', 'id')),
+    )
+
+
+# Этап: (тип синхронизации, функция, этапы, которые должны успешно завершиться раньше)
+SYNC_ALL_STAGES = {
+    'products': ('products', run_products_stage, ()),
+    'warehouses': ('warehouses', run_warehouses_stage, ()),
+    'store_stock': ('store_stock', run_store_stock_stage, ('products', 'warehouses')),
+}
+
+
+def run_stage(api, parent, name, params):
+    """Этап в отдельном потоке: дочерний SyncLog и блокировка своего типа синхронизации"""
+    sync_type, runner, _ = SYNC_ALL_STAGES[name]
+    try:
+        with advisory_lock(get_sync_lock_name(sync_type), wait=True):
+            sync_log = SyncLog.start(sync_type, parent=parent)
+            sync_log.is_full = bool(params.get('full'))
+            try:
+                runner(api, sync_log, params)
+                sync_log.finish()
+            except Exception as e:
+                logger.error(f"sync_all: ошибка этапа {name}: {e}")
+                sync_log.finish(error=e)
+        return sync_log
+    finally:
+        connection.close()
+
+
+def skip_stage(parent, name, failed):
+    sync_type = SYNC_ALL_STAGES[name][0]
+    return SyncLog.objects.create(
+        sync_type=sync_type,
+        status='skipped',
+        parent=parent,
+        error_message=f"Не выполнены этапы: {', '.join(failed)}",
+        finished_at=timezone.now(),
+    )
+
+
+def run_all(api, sync_log, params, stages=None, parallel=None):
+    """
+    Синхронизация всех данных: независимые этапы выполняются параллельно
+    в потоках с общим для процесса лимитом запросов, зависимые (остатки
+    по складам) стартуют после успешного завершения своих зависимостей.
+
+    sync_log — родительский лог, у каждого этапа свой дочерний SyncLog,
+    сводка по этапам записывается в stats родителя. Если хотя бы один этап
+    завершился ошибкой или пропущен, выбрасывается RuntimeError.
+    """
+    stages = [name for name in SYNC_ALL_STAGES if not stages or name in stages]
+    parallel = parallel or settings.MOYSKLAD_SYNC_ALL_PARALLEL
+    params = {
+        **params,
+        'workers': params.get('workers') or max(1, settings.MOYSKLAD_MAX_WORKERS // parallel),
+    }
+    sync_log.is_full = bool(params.get('full'))
+
+    pending = list(stages)
+    running = {}
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix='sync-all') as executor:
+        while pending or running:
+            for name in list(pending):
+                depends = [stage for stage in SYNC_ALL_STAGES[name][2] if stage in stages]
+                failed = [stage for stage in depends if stage in results and results[stage].status != 'success']
+                if failed:
+                    results[name] = skip_stage(sync_log, name, failed)
+                    pending.remove(name)
+                elif all(stage in results for stage in depends):
+                    running[executor.submit(run_stage, api, sync_log, name, params)] = name
+                    pending.remove(name)
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                results[running.pop(future)] = future.result()
+
+    for name in stages:
+        child = results[name]
+        sync_log.stats[name] = {
+            'status': child.status,
+            'processed': child.items_processed,
+            'created': child.items_created,
+            'updated': child.items_updated,
+            'unchanged': child.items_unchanged,
+        }
+        sync_log.items_processed += child.items_processed
+        sync_log.pages_processed += child.pages_processed
+
+    failed = [name for name in stages if results[name].status != 'success']
+    if failed:
+        raise RuntimeError(f"Этапы завершились с ошибкой или пропущены: {', '.join(failed)}")
+
+    return sync_log
@@ -0,0 +1,173 @@
+import random
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from integration.models import Order
+from integration.services.order_sync import ORDERS_ENDPOINT, format_moment
+from integration.services.utils import chunks
+import logging
+
+logger = logging.getLogger(__name__)
+
+PUSH_UPDATE_FIELDS = ['moysklad_id', 'number', 'raw_data', 'push_status', 'push_attempts', 'next_push_at', 'push_error']
+
+# externalCode в одном запросе поиска (ограничено длиной URL)
+EXTERNAL_CODE_BATCH = 100
+
+
+def create_outbound_order(**fields):
+    """
+    Сохранение заказа магазина в исходящую очередь без обращения к МойСклад
+    (ID МойСклад у такого заказа появится после отправки). Если external_code
+    не передан, генерируется новый: по нему повторная отправка не создаёт
+    в МойСклад второй заказ.
+    """
+    order = Order(**fields)
+    order.moysklad_id = None
+    order.external_code = order.external_code or uuid.uuid4().hex
+    order.push_status = 'pending'
+    order.push_attempts = 0
+    order.next_push_at = timezone.now()
+    order.save()
+    return order
+
+
+def requeue_orders(queryset):
+    """Возврат заказов с ошибкой отправки в очередь, возвращает число заказов"""
+    return queryset.filter(push_status='error', moysklad_id__isnull=True).update(
+        push_status='pending', push_attempts=0, next_push_at=timezone.now(), push_error=None
+    )
+
+
+def build_order_payload(order):
+    """
+    Тело заказа покупателя для МойСклад: payload от магазина (организация,
+    контрагент, позиции и т.п.), дополненный номером, датой, комментарием
+    и externalCode — ключом идемпотентности.
+    """
+    payload = dict(order.payload or {})
+    payload.setdefault('name', order.number)
+    payload.setdefault('moment', format_moment(order.order_date))
+    if order.comment:
+        payload.setdefault('description', order.comment)
+    payload['externalCode'] = order.external_code
+    return payload
+
+
+def get_retry_delay(attempts):
+    """Экспоненциальная задержка перед повтором со случайной добавкой, секунды"""
+    cap = min(
+        settings.MOYSKLAD_ORDER_PUSH_MAX_DELAY,
+        settings.MOYSKLAD_ORDER_PUSH_RETRY_DELAY * 2 ** (attempts - 1),
+    )
+    return random.uniform(cap / 2, cap)
+
+
+def claim_orders(limit=None):
+    """
+    Захват пачки заказов, срок следующей попытки которых наступил. Заказы
+    блокируются через SKIP LOCKED только на время захвата: next_push_at
+    сдвигается на MOYSKLAD_ORDER_PUSH_LEASE_SECONDS, и если обработчик упадёт,
+    заказы вернутся в очередь после этого срока.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(push_status='pending', next_push_at__lte=now)
+            .order_by('next_push_at')[:limit or settings.MOYSKLAD_ORDER_PUSH_BATCH_SIZE]
+        )
+        for order in orders:
+            order.push_attempts += 1
+            order.next_push_at = now + timedelta(seconds=settings.MOYSKLAD_ORDER_PUSH_LEASE_SECONDS)
+        Order.objects.bulk_update(orders, ['push_attempts', 'next_push_at'])
+    return orders
+
+
+def find_pushed(api, orders):
+    """
+    Заказы, уже созданные в МойСклад предыдущей попыткой (ответ на которую
+    был потерян): {externalCode: данные заказа}
+    """
+    found = {}
+    codes = [order.external_code for order in orders]
+    for batch in chunks(codes, EXTERNAL_CODE_BATCH):
+        for row in api.iter_by_field(ORDERS_ENDPOINT, 'externalCode', batch):
+            found[row.get('externalCode')] = row
+    return found
+
+
+def mark_sent(order, data):
+    order.moysklad_id = data['id']
+    order.number = (data.get('name') or order.number)[:255]
+    order.raw_data = data
+    order.push_status = 'sent'
+    order.next_push_at = None
+    order.push_error = None
+
+
+def mark_failed(order, error, retry=True):
+    """Ошибка отправки: повтор с задержкой, пока не исчерпаны попытки"""
+    order.push_error = str(error)
+    if retry and order.push_attempts < settings.MOYSKLAD_ORDER_PUSH_MAX_ATTEMPTS:
+        order.next_push_at = timezone.now() + timedelta(seconds=get_retry_delay(order.push_attempts))
+    else:
+        order.push_status = 'error'
+        order.next_push_at = None
+
+
+def push_orders(api, limit=None):
+    """
+    Отправка очередной пачки заказов одним массовым POST, возвращает
+    (отправлено, отложено, ошибок) или None, если отправлять нечего.
+
+    Заказы, которые уже отправлялись, сначала ищутся в МойСклад по externalCode
+    и повторно не создаются. Ответ МойСклад записывается в заказ (moysklad_id,
+    номер, raw_data). Статус error сразу получают только заказы с собственными
+    ошибками МойСклад (post_batch относит к элементам и ошибки запроса, который
+    МойСклад отклонил из-за одного из них). При сбое запроса целиком (сеть,
+    5xx, лимит запросов) пачка повторяется с экспоненциальной задержкой
+    до MOYSKLAD_ORDER_PUSH_MAX_ATTEMPTS попыток.
+    """
+    orders = claim_orders(limit)
+    if not orders:
+        return None
+
+    try:
+        found = find_pushed(api, [order for order in orders if order.push_attempts > 1])
+        to_send = []
+        for order in orders:
+            if order.external_code in found:
+                mark_sent(order, found[order.external_code])
+            else:
+                to_send.append(order)
+
+        if to_send:
+            results = api.create_orders([build_order_payload(order) for order in to_send])
+            for order, (item, data, errors) in zip(to_send, results):
+                if errors is None:
+                    mark_sent(order, data)
+                else:
+                    mark_failed(order, errors, retry=False)
+
+    except Exception as e:
+        logger.error(f"Ошибка отправки заказов в МойСклад: {e}")
+        for order in orders:
+            if order.push_status == 'pending' and order.moysklad_id is None:
+                mark_failed(order, e)
+
+    with transaction.atomic():
+        # Заказ мог быть привязан вебхуком (save_orders) во время отправки
+        linked = set(
+            Order.objects.filter(pk__in=[order.pk for order in orders], moysklad_id__isnull=False)
+            .values_list('pk', flat=True)
+        )
+        orders = [order for order in orders if order.pk not in linked or order.moysklad_id]
+        Order.objects.bulk_update(orders, PUSH_UPDATE_FIELDS)
+
+    sent = sum(1 for order in orders if order.push_status == 'sent')
+    failed = sum(1 for order in orders if order.push_status == 'error')
+    return sent, len(orders) - sent - failed, failed
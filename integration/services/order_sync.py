@@ -0,0 +1,86 @@
+from datetime import datetime
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from integration.models import Order
+from integration.services.utils import chunks
+import logging
+
+logger = logging.getLogger(__name__)
+
+ORDERS_ENDPOINT = 'entity/customerorder'
+
+KOPECKS = Decimal(100)
+
+ORDER_UPDATE_FIELDS = ['number', 'total_amount', 'order_date', 'raw_data', 'updated_at', 'last_sync']
+
+
+def parse_moment(value):
+    """Дата МойСклад 'YYYY-MM-DD HH:MM:SS.fff' (время аккаунта) в aware datetime"""
+    moment = datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S')
+    return moment.replace(tzinfo=ZoneInfo(settings.MOYSKLAD_TIMEZONE))
+
+
+def format_moment(value):
+    """aware datetime в формат даты МойСклад (время аккаунта)"""
+    return value.astimezone(ZoneInfo(settings.MOYSKLAD_TIMEZONE)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def get_order_info(order_data):
+    """Преобразование заказа покупателя МойСклад в поля integration.Order"""
+    return {
+        'number': order_data.get('name', '')[:255],
+        'total_amount': Decimal(order_data.get('sum') or 0) / KOPECKS,
+        'order_date': parse_moment(order_data['moment']) if order_data.get('moment') else timezone.now(),
+        'raw_data': order_data,
+    }
+
+
+def save_orders(rows):
+    """
+    Пакетная запись заказов покупателей через INSERT ... ON CONFLICT по moysklad_id,
+    возвращает (создано, обновлено). Статус и данные клиента не перезаписываются:
+    ими управляет магазин. Заказы магазина из исходящей очереди, ответ на отправку
+    которых ещё не записан, сопоставляются по externalCode и не дублируются.
+    """
+    orders = {row['id']: row for row in rows if row.get('id')}
+    items_created = 0
+    items_updated = 0
+
+    with transaction.atomic():
+        for batch in chunks(list(orders), settings.MOYSKLAD_SYNC_BATCH_SIZE):
+            link_outbound_orders({
+                orders[moysklad_id]['externalCode']: moysklad_id
+                for moysklad_id in batch if orders[moysklad_id].get('externalCode')
+            })
+            existing = set(Order.objects.filter(moysklad_id__in=batch).values_list('moysklad_id', flat=True))
+            Order.objects.bulk_create(
+                [Order(moysklad_id=moysklad_id, **get_order_info(orders[moysklad_id])) for moysklad_id in batch],
+                update_conflicts=True,
+                unique_fields=['moysklad_id'],
+                update_fields=ORDER_UPDATE_FIELDS,
+            )
+            items_created += len(batch) - len(existing)
+            items_updated += len(existing)
+
+    return items_created, items_updated
+
+
+def link_outbound_orders(codes):
+    """
+    Привязка заказов исходящей очереди к заказам МойСклад по {externalCode: ID}:
+    такие заказы считаются отправленными и повторно не отправляются.
+    """
+    if not codes:
+        return 0
+
+    orders = list(Order.objects.filter(moysklad_id__isnull=True, external_code__in=list(codes)))
+    for order in orders:
+        order.moysklad_id = codes[order.external_code]
+        order.push_status = 'sent'
+        order.next_push_at = None
+    Order.objects.bulk_update(orders, ['moysklad_id', 'push_status', 'next_push_at'])
+    return len(orders)
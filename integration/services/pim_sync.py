@@ -0,0 +1,215 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+from django.utils.text import slugify
+from catalog.models import Brand
+from products.models import Product
+from integration.services.utils import chunks, get_content_hash, restore_removed, split_by_hash
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Временный SKU товара, освобождающего свой SKU в той же пачке
+PARKED_SKU_PREFIX = '~'
+
+PIM_PRODUCT_UPDATE_FIELDS = [
+    'sku', 'article', 'barcode', 'name', 'brand', 'weight', 'volume',
+    'is_kaspi', 'is_satu', 'is_promo', 'moysklad_path', 'archived',
+    'raw_data', 'content_hash', 'seen_at', 'sync_generation', 'updated_at', 'last_sync',
+]
+
+
+def get_attributes(product_data):
+    """Доп. поля товара МойСклад: {название: значение}"""
+    attributes = {}
+    for attribute in product_data.get('attributes', []):
+        value = attribute.get('value')
+        # Значения-справочники приходят объектом с name
+        if isinstance(value, dict):
+            value = value.get('name')
+        attributes[attribute.get('name')] = value
+    return attributes
+
+
+def get_barcode(product_data):
+    """Первый штрихкод товара (любого формата)"""
+    for barcode in product_data.get('barcodes', []):
+        for value in barcode.values():
+            return str(value)[:50]
+    return ''
+
+
+def get_decimal(value):
+    return Decimal(str(value)) if value is not None else None
+
+
+def get_pim_product_info(product_data):
+    """Преобразование товара МойСклад в поля products.Product (бренд — по названию)"""
+    attributes = get_attributes(product_data)
+    brand = attributes.get(settings.MOYSKLAD_BRAND_ATTRIBUTE)
+
+    info = {
+        'sku': (product_data.get('code') or product_data['id'])[:100],
+        'article': (product_data.get('article') or '')[:100],
+        'barcode': get_barcode(product_data),
+        'name': product_data.get('name', '')[:500],
+        'brand_name': str(brand).strip()[:100] if brand else None,
+        'weight': get_decimal(product_data.get('weight')),
+        'volume': get_decimal(product_data.get('volume')),
+        'moysklad_path': (product_data.get('pathName') or '')[:500],
+        'archived': product_data.get('archived', False),
+        'raw_data': product_data,
+    }
+    for field, attribute_name in settings.MOYSKLAD_FLAG_ATTRIBUTES.items():
+        info[field] = bool(attributes.get(attribute_name))
+
+    return info
+
+
+def get_brand_slugs(names):
+    """
+    Уникальные слаги для новых брендов: если слаг уже занят (другим брендом
+    или другим названием из names), добавляется суффикс -2, -3, ...
+    """
+    max_length = Brand._meta.get_field('slug').max_length
+    bases = {name: (slugify(name, allow_unicode=True) or 'brand')[:max_length] for name in names}
+
+    prefixes = Q()
+    for base in set(bases.values()):
+        prefixes |= Q(slug__startswith=base[:max_length - 4])
+    taken = set(Brand.objects.filter(prefixes).values_list('slug', flat=True))
+
+    slugs = {}
+    for name in sorted(names):
+        slug = base = bases[name]
+        number = 2
+        while slug in taken:
+            suffix = f'-{number}'
+            slug = base[:max_length - len(suffix)] + suffix
+            number += 1
+        taken.add(slug)
+        slugs[name] = slug
+    return slugs
+
+
+def resolve_brands(names, brands):
+    """
+    Дополнение кэша брендов {название: pk}: недостающие бренды создаются
+    одним INSERT ... ON CONFLICT DO NOTHING и дочитываются одним запросом.
+    Бренды, которые так и не удалось найти (например, слаг занял параллельный
+    запуск), попадают в лог, их товары сохраняются без бренда.
+    """
+    missing = {name for name in names if name and name not in brands}
+    if not missing:
+        return brands
+
+    # Бренд мог уже существовать под тем же названием
+    brands.update(Brand.objects.filter(name__in=missing).values_list('name', 'id'))
+    missing -= set(brands)
+    if not missing:
+        return brands
+
+    Brand.objects.bulk_create(
+        [Brand(name=name, slug=slug) for name, slug in get_brand_slugs(missing).items()],
+        ignore_conflicts=True,
+    )
+    brands.update(Brand.objects.filter(name__in=missing).values_list('name', 'id'))
+
+    unresolved = missing - set(brands)
+    if unresolved:
+        logger.warning(f"Не удалось создать бренды: {', '.join(sorted(unresolved))}")
+    return brands
+
+
+def save_pim_products(rows, brands, generation=None):
+    """
+    Пакетная запись страницы товаров в products.Product,
+    возвращает (создано, обновлено, без изменений).
+
+    Перезаписываются только новые товары и товары с изменившимся хэшем данных,
+    у остальных одним UPDATE сдвигаются seen_at и sync_generation. brands — кэш
+    {название бренда: pk} на время запуска. SKU уникален, поэтому если код
+    товара уже занят другим товаром, SKU заменяется на ID МойСклад; товары
+    пачки, меняющие SKU, перед записью освобождают прежний.
+    """
+    products = {row['id']: row for row in rows if row.get('id')}
+
+    items_created = 0
+    items_updated = 0
+    items_unchanged = 0
+    now = timezone.now()
+
+    with transaction.atomic():
+        for batch in chunks(list(products), settings.MOYSKLAD_SYNC_BATCH_SIZE):
+            hashes = {moysklad_id: get_content_hash(products[moysklad_id]) for moysklad_id in batch}
+            created, changed, unchanged = split_by_hash(Product, hashes)
+
+            if unchanged:
+                Product.objects.filter(moysklad_id__in=unchanged).update(
+                    seen_at=now, sync_generation=generation
+                )
+            restore_removed(Product, list(hashes))
+
+            items_created += len(created)
+            items_updated += len(changed)
+            items_unchanged += len(unchanged)
+
+            ids = created + changed
+            if not ids:
+                continue
+
+            infos = {moysklad_id: get_pim_product_info(products[moysklad_id]) for moysklad_id in ids}
+            resolve_brands({info['brand_name'] for info in infos.values()}, brands)
+            taken_skus = dict(
+                Product.objects.filter(
+                    sku__in=[info['sku'] for info in infos.values()]
+                ).exclude(moysklad_id__in=ids).values_list('sku', 'moysklad_id')
+            )
+            stored_skus = dict(Product.objects.filter(moysklad_id__in=ids).values_list('moysklad_id', 'sku'))
+
+            # SKU в первую очередь достаётся товару, за которым он уже закреплён
+            ordered = sorted(infos, key=lambda moysklad_id: stored_skus.get(moysklad_id) != infos[moysklad_id]['sku'])
+            seen_skus = set()
+            for moysklad_id in ordered:
+                info = infos[moysklad_id]
+                if info['sku'] in taken_skus or info['sku'] in seen_skus:
+                    logger.warning(f"SKU {info['sku']} уже занят, для {moysklad_id} используется ID")
+                    info['sku'] = moysklad_id
+                seen_skus.add(info['sku'])
+
+            # ON CONFLICT срабатывает только по moysklad_id: товары пачки, меняющие SKU
+            # (обмен SKU, SKU переходит к новому товару), сначала освобождают старый
+            parked = [
+                moysklad_id for moysklad_id, sku in stored_skus.items()
+                if sku != infos[moysklad_id]['sku']
+            ]
+            if parked:
+                Product.objects.filter(moysklad_id__in=parked).update(
+                    sku=Concat(Value(PARKED_SKU_PREFIX), 'moysklad_id')
+                )
+
+            objects = []
+            for moysklad_id, info in infos.items():
+                brand_name = info.pop('brand_name')
+                objects.append(Product(
+                    moysklad_id=moysklad_id,
+                    brand_id=brands.get(brand_name),
+                    content_hash=hashes[moysklad_id],
+                    seen_at=now,
+                    sync_generation=generation,
+                    **info
+                ))
+
+            Product.objects.bulk_create(
+                objects,
+                update_conflicts=True,
+                unique_fields=['moysklad_id'],
+                update_fields=PIM_PRODUCT_UPDATE_FIELDS,
+            )
+
+    return items_created, items_updated, items_unchanged
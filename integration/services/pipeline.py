@@ -0,0 +1,124 @@
+from django.db import transaction
+from integration.models import Product
+from products.models import Product as PimProduct
+from integration.services.checkpoint import iter_checkpointed
+from integration.services.locks import advisory_lock, get_sync_lock_name
+from integration.services.pim_sync import save_pim_products
+from integration.services.price_sync import save_prices, sync_price_types
+from integration.services.product_sync import PRODUCTS_ENDPOINT, save_products, sync_products
+from integration.services.sweep import sweep_unseen
+from integration.services.warehouse_sync import save_store_stock_page, sync_warehouses
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+STORE_STOCK_ENDPOINT = 'report/stock/bystore'
+
+
+class CatalogPipeline:
+    """
+    Конвейер синхронизации каталога: fetch → transform → bulk load.
+
+    Каждая страница entity/product читается из МойСклад один раз и в одной
+    транзакции раскладывается по integration.Product, products.Product и
+    pricing.Price. Затем отчёт report/stock/bystore так же за один проход
+    заполняет inventory.Stock и суммарные остатки integration.Product.
+    Справочники (типы цен, бренды, склады) загружаются один раз за запуск.
+    После полного прохода товары, не полученные из МойСклад, снимаются
+    с активности (mark-and-sweep по поколению запуска).
+    """
+
+    def __init__(self, api, sync_log, workers=None):
+        self.api = api
+        self.sync_log = sync_log
+        self.workers = workers
+        self.price_types = {}
+        self.brands = {}
+        # Поколение — ID лога запуска, им помечаются все полученные товары
+        self.generation = sync_log.pk
+
+    def run(self, full=None, stock=False, progress=None, resume=False):
+        """
+        Запуск конвейера. resume=True — продолжение прерванного запуска
+        с контрольной точки sync_log (этап товаров или остатков).
+        """
+        checkpoint = self.sync_log.checkpoint if resume else {}
+        self.load_references()
+
+        # Точка на этапе остатков означает, что товары уже загружены целиком
+        if checkpoint.get('entity') != STORE_STOCK_ENDPOINT:
+            sync_products(
+                self.api, self.sync_log,
+                progress=progress,
+                workers=self.workers,
+                full=full,
+                save_page=self.save_products_page,
+                checkpoint=checkpoint,
+            )
+
+            # Полный проход видел все товары МойСклад: остальные удалены там
+            if self.sync_log.is_full:
+                self.sweep()
+
+        if stock:
+            self.load_store_stock(checkpoint)
+
+        return self.sync_log
+
+    def load_references(self):
+        """Справочники, нужные для записи страниц товаров"""
+        self.price_types = sync_price_types(self.api)
+
+    def load_store_stock(self, checkpoint):
+        """
+        Склады и остатки по складам, с контрольной точкой после каждой страницы.
+        Остатки пишутся под блокировкой синхронизации остатков.
+        """
+        # Счётчики items_* относятся к товарам, остатки учитываются только в stats
+        with advisory_lock(get_sync_lock_name('store_stock'), wait=True):
+            warehouse_ids = sync_warehouses(self.api)
+            pages = iter_checkpointed(
+                self.api, self.sync_log, STORE_STOCK_ENDPOINT,
+                workers=self.workers, checkpoint=checkpoint,
+            )
+            for _, rows in pages:
+                save_store_stock_page(rows, warehouse_ids, self.sync_log)
+
+    def save_products_page(self, rows):
+        """
+        Запись страницы товаров во все целевые таблицы,
+        возвращает (создано, обновлено, без изменений) для integration.Product.
+        """
+        with transaction.atomic():
+            created, updated, unchanged = save_products(rows, generation=self.generation)
+            pim_created, pim_updated, pim_unchanged = save_pim_products(
+                rows, self.brands, generation=self.generation
+            )
+            prices = save_prices(rows, self.price_types)
+
+        self.sync_log.add_stats(
+            'integration.Product', created=created, updated=updated, unchanged=unchanged
+        )
+        self.sync_log.add_stats(
+            'products.Product', created=pim_created, updated=pim_updated, unchanged=pim_unchanged
+        )
+        self.sync_log.add_stats(
+            'pricing.Price', created=prices[0], updated=prices[1], unchanged=prices[2]
+        )
+
+        return created, updated, unchanged
+
+    def sweep(self, expected=None):
+        """
+        Mark-and-sweep: снятие товаров, не отмеченных поколением этого запуска.
+        Очистка выполняется, только если запуск получил не меньше expected
+        товаров (по умолчанию — текущий meta.size entity/product): при сдвиге
+        страниц во время обхода часть товаров могла быть пропущена.
+        """
+        if expected is None:
+            expected = self.api.get_size(PRODUCTS_ENDPOINT)
+        for model, target in ((Product, 'integration.Product'), (PimProduct, 'products.Product')):
+            removed = sweep_unseen(model, self.generation, expected=expected)
+            if removed is not None:
+                self.sync_log.add_stats(target, removed=removed)
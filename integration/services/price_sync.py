@@ -0,0 +1,147 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from pricing.models import Price, PriceType
+from products.models import Product
+from integration.services.copy_load import copy_upsert, use_copy_load
+from integration.services.utils import chunks
+import logging
+
+logger = logging.getLogger(__name__)
+
+KOPECKS = Decimal(100)
+CENTS = Decimal('0.01')
+
+
+def get_price(value):
+    """Перевод цены МойСклад из копеек в Decimal без потерь float"""
+    return (Decimal(value or 0) / KOPECKS).quantize(CENTS)
+
+
+def sync_price_types(api):
+    """
+    Загрузка типов цен в pricing.PriceType одним upsert по moysklad_id.
+
+    Флаги (по умолчанию, публичная, оптовая) настраиваются вручную и не
+    перезаписываются. Возвращает кэш moysklad_id → PriceType на время запуска.
+    """
+    price_types = [
+        PriceType(
+            moysklad_id=price_type['id'],
+            name=price_type.get('name', '')[:100],
+            external_code=price_type.get('externalCode') or '',
+            sort_order=index,
+        )
+        for index, price_type in enumerate(api.get_price_types())
+    ]
+
+    PriceType.objects.bulk_create(
+        price_types,
+        update_conflicts=True,
+        unique_fields=['moysklad_id'],
+        update_fields=['name', 'external_code', 'updated_at'],
+    )
+
+    return {price_type.moysklad_id: price_type for price_type in PriceType.objects.all()}
+
+
+def save_prices(rows, price_types):
+    """
+    Запись цен страницы товаров в pricing.Price.
+
+    Товары разрешаются одним запросом, текущие цены читаются одним запросом
+    на пачку, записываются только новые и изменившиеся пары (товар, тип цены)
+    через INSERT ... ON CONFLICT. Возвращает (создано, обновлено, без изменений).
+    """
+    prices = {}
+    for product_data in rows:
+        for sale_price in product_data.get('salePrices', []):
+            price_type = price_types.get(sale_price.get('priceType', {}).get('id'))
+            if price_type:
+                prices[(product_data['id'], price_type.pk)] = get_price(sale_price.get('value'))
+
+    product_ids = dict(
+        Product.objects.filter(
+            moysklad_id__in={product_id for product_id, _ in prices}
+        ).values_list('moysklad_id', 'id')
+    )
+
+    keys = [key for key in prices if key[0] in product_ids]
+    now = timezone.now()
+
+    if use_copy_load():
+        return copy_upsert(
+            Price,
+            [
+                Price(
+                    product_id=product_ids[product_id],
+                    price_type_id=price_type_id,
+                    price=prices[(product_id, price_type_id)],
+                )
+                for product_id, price_type_id in keys
+            ],
+            unique_fields=['product', 'price_type'],
+            update_fields=['price', 'updated_at'],
+            compare_fields=['price'],
+        )
+
+    items_created = 0
+    items_updated = 0
+    items_unchanged = 0
+
+    with transaction.atomic():
+        for batch in chunks(keys, settings.MOYSKLAD_SYNC_BATCH_SIZE):
+            existing = {
+                (product_id, price_type_id): price
+                for product_id, price_type_id, price in Price.objects.filter(
+                    product_id__in={product_ids[product_id] for product_id, _ in batch},
+                ).values_list('product_id', 'price_type_id', 'price')
+            }
+
+            changed = []
+            for product_id, price_type_id in batch:
+                pk = product_ids[product_id]
+                price = prices[(product_id, price_type_id)]
+                current = existing.get((pk, price_type_id))
+                if current == price:
+                    items_unchanged += 1
+                    continue
+
+                if current is None:
+                    items_created += 1
+                else:
+                    items_updated += 1
+                changed.append(Price(
+                    product_id=pk,
+                    price_type_id=price_type_id,
+                    price=price,
+                    updated_at=now,
+                ))
+
+            if changed:
+                Price.objects.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=['product', 'price_type'],
+                    update_fields=['price', 'updated_at'],
+                )
+
+    return items_created, items_updated, items_unchanged
+
+
+def sync_prices(api, sync_log, workers=None):
+    """Синхронизация типов цен и цен всех товаров (pricing.PriceType / pricing.Price)"""
+    price_types = sync_price_types(api)
+
+    for rows in api.iter_pages('entity/product', workers=workers):
+        created, updated, unchanged = save_prices(rows, price_types)
+
+        sync_log.pages_processed += 1
+        sync_log.items_processed += len(rows)
+        sync_log.items_created += created
+        sync_log.items_updated += updated
+        sync_log.items_unchanged += unchanged
+
+    return sync_log
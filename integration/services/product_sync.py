@@ -0,0 +1,204 @@
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from integration.models import Product, SyncState
+from integration.services.checkpoint import iter_checkpointed
+from integration.services.copy_load import copy_upsert, use_copy_load
+from integration.services.utils import chunks, get_content_hash, restore_removed, split_by_hash
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+PRODUCTS_ENDPOINT = 'entity/product'
+
+# Обход идёт в устойчивом порядке: без сортировки МойСклад не гарантирует,
+# что строки не переместятся между страницами (и не будут пропущены очисткой
+# или меткой updated)
+FULL_SYNC_ORDER = 'id'
+INCREMENTAL_SYNC_ORDER = 'updated;id'
+
+PRODUCT_UPDATE_FIELDS = [
+    'name', 'code', 'article', 'description', 'price', 'archived',
+    'external_code', 'raw_data', 'content_hash', 'seen_at', 'sync_generation',
+    'updated_at', 'last_sync',
+]
+
+
+def get_product_info(product_data):
+    """Преобразование товара МойСклад в поля integration.Product"""
+    price = 0
+    sale_prices = product_data.get('salePrices', [])
+    if sale_prices:
+        price = sale_prices[0].get('value', 0) / 100
+
+    return {
+        'name': product_data.get('name', ''),
+        'code': product_data.get('code'),
+        'article': product_data.get('article'),
+        'description': product_data.get('description'),
+        'price': price,
+        'archived': product_data.get('archived', False),
+        'external_code': product_data.get('externalCode'),
+        'raw_data': product_data,
+    }
+
+
+def save_products(rows, generation=None):
+    """
+    Пакетное сохранение страницы товаров, возвращает (создано, обновлено, без изменений).
+
+    На пачку из MOYSKLAD_SYNC_BATCH_SIZE товаров выполняется один SELECT
+    сохранённых хэшей и один INSERT ... ON CONFLICT DO UPDATE только для новых
+    и изменившихся товаров. У неизменённых одним UPDATE сдвигаются seen_at и
+    sync_generation, raw_data и updated_at/last_sync не трогаются.
+    """
+    # При повторе id в одной пачке ON CONFLICT упадёт, оставляем последнюю версию
+    products = {row.get('id'): row for row in rows if row.get('id')}
+    now = timezone.now()
+
+    if use_copy_load():
+        with transaction.atomic():
+            counts = copy_upsert(
+                Product,
+                [
+                    Product(
+                        moysklad_id=moysklad_id,
+                        content_hash=get_content_hash(product_data),
+                        seen_at=now,
+                        sync_generation=generation,
+                        **get_product_info(product_data)
+                    )
+                    for moysklad_id, product_data in products.items()
+                ],
+                unique_fields=['moysklad_id'],
+                update_fields=PRODUCT_UPDATE_FIELDS,
+                compare_fields=['content_hash'],
+                touch_fields=['seen_at', 'sync_generation'],
+            )
+            restore_removed(Product, list(products))
+        return counts
+
+    items_created = 0
+    items_updated = 0
+    items_unchanged = 0
+
+    with transaction.atomic():
+        for batch in chunks(list(products.items()), settings.MOYSKLAD_SYNC_BATCH_SIZE):
+            hashes = {moysklad_id: get_content_hash(data) for moysklad_id, data in batch}
+            created, changed, unchanged = split_by_hash(Product, hashes)
+
+            if created or changed:
+                Product.objects.bulk_create(
+                    [
+                        Product(
+                            moysklad_id=moysklad_id,
+                            content_hash=hashes[moysklad_id],
+                            seen_at=now,
+                            sync_generation=generation,
+                            **get_product_info(products[moysklad_id])
+                        )
+                        for moysklad_id in created + changed
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['moysklad_id'],
+                    update_fields=PRODUCT_UPDATE_FIELDS,
+                )
+            if unchanged:
+                Product.objects.filter(moysklad_id__in=unchanged).update(
+                    seen_at=now, sync_generation=generation
+                )
+            restore_removed(Product, list(hashes))
+
+            items_created += len(created)
+            items_updated += len(changed)
+            items_unchanged += len(unchanged)
+
+    return items_created, items_updated, items_unchanged
+
+
+def cap_watermark(watermark, sync_log):
+    """
+    Метка updated не позже начала запуска (во времени аккаунта): товар,
+    изменённый во время обхода, мог оказаться на уже прочитанной странице,
+    и метка по более поздним строкам пропустила бы его навсегда.
+    """
+    started = timezone.localtime(sync_log.started_at, ZoneInfo(settings.MOYSKLAD_TIMEZONE))
+    return min(watermark, started.strftime('%Y-%m-%d %H:%M:%S.000')) if watermark else watermark
+
+
+def is_full_sync_due(state):
+    """Нужна ли полная синхронизация: нет метки или истёк интервал полной выгрузки"""
+    if not state.watermark or not state.last_full_sync:
+        return True
+    interval = timedelta(hours=settings.MOYSKLAD_FULL_SYNC_INTERVAL_HOURS)
+    return timezone.now() - state.last_full_sync >= interval
+
+
+def sync_products(api, sync_log, progress=None, workers=None, full=None, save_page=save_products,
+                  checkpoint=None):
+    """
+    Потоковая синхронизация товаров: каждая страница записывается в БД сразу
+    после загрузки, поэтому память не растёт вместе с каталогом.
+
+    В инкрементальном режиме запрашиваются только товары с updated не раньше
+    сохранённой метки SyncState. Полная выгрузка выполняется при full=True,
+    при отсутствии метки или раз в MOYSKLAD_FULL_SYNC_INTERVAL_HOURS.
+
+    После каждой записанной страницы в sync_log сохраняется контрольная точка;
+    checkpoint — точка прерванного запуска, обход продолжается с неё с теми же
+    фильтром и режимом.
+
+    progress — необязательный callback(page_number, created, updated),
+    workers — число параллельных запросов к API (по умолчанию MOYSKLAD_MAX_WORKERS),
+    save_page — запись страницы, возвращает (создано, обновлено, без изменений);
+    по умолчанию только integration.Product, конвейер каталога подставляет свою.
+    """
+    state, _ = SyncState.objects.get_or_create(sync_type='products')
+
+    params = {}
+    if checkpoint and checkpoint.get('entity') == PRODUCTS_ENDPOINT:
+        # Режим и фильтр прерванного запуска восстанавливаются из точки
+        full = sync_log.is_full
+    else:
+        if full is None:
+            full = is_full_sync_due(state)
+        if full:
+            params['order'] = FULL_SYNC_ORDER
+        else:
+            # Фильтр МойСклад принимает время с точностью до секунды
+            params['filter'] = f'updated>={state.watermark[:19]}'
+            params['order'] = INCREMENTAL_SYNC_ORDER
+
+    sync_log.is_full = full
+    position = {'watermark': state.watermark}
+
+    pages = iter_checkpointed(
+        api, sync_log, PRODUCTS_ENDPOINT,
+        params=params, workers=workers, checkpoint=checkpoint, state=position,
+    )
+    for page_number, rows in pages:
+        created, updated, unchanged = save_page(rows)
+
+        sync_log.pages_processed += 1
+        sync_log.items_processed += len(rows)
+        sync_log.items_created += created
+        sync_log.items_updated += updated
+        sync_log.items_unchanged += unchanged
+        position['watermark'] = max(
+            [position['watermark'] or ''] + [row.get('updated', '') for row in rows]
+        ) or None
+
+        if progress:
+            progress(page_number, created, updated)
+
+    # Метка сдвигается только после успешной обработки всех страниц
+    state.watermark = cap_watermark(position['watermark'], sync_log)
+    if full:
+        state.last_full_sync = sync_log.started_at
+    state.save()
+
+    return sync_log
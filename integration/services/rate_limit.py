@@ -0,0 +1,69 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket, общий для всех потоков процесса.
+
+    По умолчанию настроен на лимит МойСклад (45 запросов за 3 секунды) и
+    подстраивается под заголовки ответа X-RateLimit-* / X-Lognex-*.
+    """
+
+    def __init__(self, rate, period):
+        self.capacity = float(rate)
+        self.fill_rate = rate / period
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+
+    def acquire(self):
+        """Ожидание свободного токена перед запросом"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.fill_rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Блокировка всех запросов на seconds секунд (например, после 429)"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def update(self, headers):
+        """Синхронизация состояния с заголовками лимитов МойСклад"""
+        limit = _int_header(headers, 'X-RateLimit-Limit')
+        interval = _int_header(headers, 'X-Lognex-Retry-TimeInterval')
+        remaining = _int_header(headers, 'X-RateLimit-Remaining', 'X-Lognex-RateLimit-Remaining')
+        reset = _int_header(headers, 'X-Lognex-Reset')
+
+        with self.lock:
+            if limit and interval:
+                self.capacity = float(limit)
+                self.fill_rate = limit / (interval / 1000)
+            if remaining is not None:
+                self.tokens = min(self.tokens, float(remaining))
+                if remaining == 0 and reset:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + reset / 1000)
+
+
+def _int_header(headers, *names):
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from integration.models import SyncLog
+from integration.services.jobs import execute_sync
+from integration.services.locks import advisory_lock, get_sync_lock_name
+import logging
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 60 * 60
+
+
+class ScheduledSync:
+    """Запись расписания: синхронизация sync_type каждые interval секунд или ежедневно в at"""
+
+    def __init__(self, name, sync_type, interval=None, at=None, params=None, jitter=0):
+        self.name = name
+        self.sync_type = sync_type
+        self.interval = interval or DAY
+        self.at = at
+        self.params = params or {}
+        self.jitter = jitter
+
+    def first_delay(self):
+        """Задержка до первого запуска, секунды"""
+        if not self.at:
+            return random.uniform(0, self.jitter)
+        hour, minute = map(int, self.at.split(':'))
+        now = timezone.localtime()
+        run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        return (run_at - now).total_seconds()
+
+    def __str__(self):
+        when = f'ежедневно в {self.at}' if self.at else f'каждые {self.interval} с'
+        return f'{self.name}: {self.sync_type} {when} {self.params}'
+
+
+def get_schedule(config, jitter=0, only=None):
+    """Записи расписания из настройки MOYSKLAD_SYNC_SCHEDULE"""
+    return [
+        ScheduledSync(name, jitter=jitter, **entry)
+        for name, entry in config.items()
+        if not only or name in only
+    ]
+
+
+def record_skipped(entry, message):
+    logger.warning(f"{entry.name}: {message}")
+    SyncLog.skip(entry.sync_type, f'{entry.name}: {message}', is_full=bool(entry.params.get('full')))
+
+
+def run_scheduled(entry):
+    """
+    Один запуск по расписанию. Если синхронизация этого типа уже идёт
+    (другой узел, другой процесс или другая запись расписания), запуск
+    пропускается и отмечается в SyncLog.
+    """
+    with advisory_lock(get_sync_lock_name(entry.sync_type)) as acquired:
+        if not acquired:
+            record_skipped(entry, 'синхронизация уже выполняется')
+            return None
+
+        sync_log = SyncLog.start(entry.sync_type, resume=bool(entry.params.get('resume')))
+        return execute_sync(sync_log, entry.params)
+
+
+def run_schedule_loop(entry, stop):
+    """
+    Цикл записи расписания в отдельном потоке, до установки события stop.
+
+    Интервалы отсчитываются от плановых моментов, а не от окончания запуска;
+    интервалы, пропущенные из-за долгого запуска, отмечаются в SyncLog.
+    """
+    planned = time.monotonic() + entry.first_delay()
+    next_run = planned
+
+    try:
+        while not stop.wait(max(0, next_run - time.monotonic())):
+            close_old_connections()
+            started = time.monotonic()
+            try:
+                run_scheduled(entry)
+            except Exception as e:
+                logger.error(f"{entry.name}: ошибка запуска по расписанию: {e}")
+
+            planned += entry.interval
+            missed = int((time.monotonic() - planned) // entry.interval) + 1
+            if missed > 0:
+                record_skipped(
+                    entry,
+                    f'запуск длился {time.monotonic() - started:.0f} с, '
+                    f'пропущено интервалов: {missed}'
+                )
+                planned += missed * entry.interval
+
+            next_run = planned + random.uniform(0, entry.jitter)
+    finally:
+        connection.close()
+
+
+def start_scheduler(schedule, stop):
+    """Запуск потоков расписания, возвращает список потоков"""
+    threads = [
+        threading.Thread(
+            target=run_schedule_loop, args=(entry, stop),
+            name=f'sync-{entry.name}', daemon=True,
+        )
+        for entry in schedule
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
@@ -0,0 +1,270 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from inventory.models import Warehouse
+from integration.models import SyncLog, SyncShard, SyncState
+from integration.services.locks import advisory_lock, get_sync_lock_name
+from integration.services.pipeline import STORE_STOCK_ENDPOINT, CatalogPipeline
+from integration.services.product_sync import FULL_SYNC_ORDER, PRODUCTS_ENDPOINT, cap_watermark
+from integration.services.warehouse_sync import save_store_stock_page, sync_warehouses
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """Аренда шарда истекла и его забрал другой обработчик"""
+
+
+def get_products_handler(api, sync_log):
+    pipeline = CatalogPipeline(api, sync_log)
+    pipeline.load_references()
+    return pipeline.save_products_page
+
+
+def get_store_stock_handler(api, sync_log):
+    warehouse_ids = dict(Warehouse.objects.values_list('moysklad_id', 'id'))
+    return lambda rows: save_store_stock_page(rows, warehouse_ids, sync_log)
+
+
+# Запись страницы шарда: фабрика (api, sync_log) -> callable(rows) -> (создано, обновлено, без изменений)
+SHARD_HANDLERS = {
+    PRODUCTS_ENDPOINT: get_products_handler,
+    STORE_STOCK_ENDPOINT: get_store_stock_handler,
+}
+
+
+def plan_shards(api, sync_log, endpoint, params=None):
+    """
+    Разбиение коллекции на шарды по MOYSKLAD_SHARD_PAGES страниц по meta.size,
+    возвращает meta.size на момент разбиения
+    """
+    size = api.get_size(endpoint, params)
+    limit = settings.MOYSKLAD_PAGE_SIZE
+    shard_size = limit * settings.MOYSKLAD_SHARD_PAGES
+
+    shards = SyncShard.objects.bulk_create([
+        SyncShard(
+            sync_log=sync_log,
+            endpoint=endpoint,
+            params=params or {},
+            offset=offset,
+            size=min(shard_size, size - offset),
+            limit=limit,
+        )
+        for offset in range(0, size, shard_size)
+    ])
+    logger.info(f"{endpoint}: {size} элементов, {len(shards)} шардов")
+    return size
+
+
+def get_lease_deadline():
+    return timezone.now() + timedelta(seconds=settings.MOYSKLAD_SHARD_LEASE_SECONDS)
+
+
+def claim_shard(worker, sync_log=None):
+    """
+    Захват ожидающего шарда или шарда с истёкшей арендой (обработчик упал).
+    SKIP LOCKED позволяет обработчикам на разных узлах не ждать друг друга.
+    """
+    shards = SyncShard.objects.filter(
+        Q(status='pending') | Q(status='running', lease_until__lt=timezone.now()),
+        attempts__lt=settings.MOYSKLAD_SHARD_MAX_ATTEMPTS,
+    )
+    if sync_log is not None:
+        shards = shards.filter(sync_log=sync_log)
+
+    with transaction.atomic():
+        shard = shards.select_for_update(skip_locked=True).order_by('id').first()
+        if shard is None:
+            return None
+
+        if shard.status == 'running':
+            logger.warning(f"Шард {shard}: аренда {shard.worker} истекла, шард передан {worker}")
+
+        shard.status = 'running'
+        shard.worker = worker
+        shard.attempts += 1
+        shard.lease_until = get_lease_deadline()
+        shard.save(update_fields=['status', 'worker', 'attempts', 'lease_until'])
+
+    return shard
+
+
+SHARD_PROGRESS_FIELDS = [
+    'pages_processed', 'items_processed', 'items_created', 'items_updated',
+    'items_unchanged', 'stats', 'watermark',
+]
+
+
+def save_shard(shard, **fields):
+    """
+    Запись прогресса шарда с продлением аренды. Запись проходит, только пока
+    шард принадлежит этой попытке, иначе выбрасывается LeaseLost.
+    """
+    values = {name: getattr(shard, name) for name in SHARD_PROGRESS_FIELDS}
+    updated = SyncShard.objects.filter(
+        pk=shard.pk, worker=shard.worker, attempts=shard.attempts
+    ).update(**values, **fields)
+    if not updated:
+        raise LeaseLost(f"Шард {shard} передан другому обработчику")
+
+
+def process_shard(api, shard, workers=None):
+    """
+    Обработка шарда: страницы диапазона загружаются и записываются тем же
+    кодом, что и при обычной синхронизации. Записи идемпотентны, поэтому
+    шард, взятый после сбоя, обрабатывается заново с начала.
+    """
+    # Накопитель счётчиков по таблицам: в БД не сохраняется, ID — поколение запуска
+    counter = SyncLog(pk=shard.sync_log_id, sync_type=shard.sync_log.sync_type)
+    handler = SHARD_HANDLERS[shard.endpoint](api, counter)
+
+    for name in SHARD_PROGRESS_FIELDS:
+        setattr(shard, name, SyncShard._meta.get_field(name).get_default())
+
+    try:
+        pages = api.iter_pages(
+            shard.endpoint, limit=shard.limit, params=shard.params, workers=workers,
+            offset=shard.offset, end=shard.offset + shard.size,
+        )
+        for rows in pages:
+            created, updated, unchanged = handler(rows)
+
+            shard.pages_processed += 1
+            shard.items_processed += len(rows)
+            shard.items_created += created
+            shard.items_updated += updated
+            shard.items_unchanged += unchanged
+            shard.stats = counter.stats
+            shard.watermark = max(
+                [shard.watermark or ''] + [row.get('updated', '') for row in rows]
+            ) or None
+            save_shard(shard, lease_until=get_lease_deadline())
+
+        save_shard(shard, status='done', finished_at=timezone.now())
+        shard.status = 'done'
+
+    except LeaseLost as e:
+        # Шард дорабатывает новый владелец, эта попытка просто прекращается
+        logger.warning(str(e))
+
+    except Exception as e:
+        logger.error(f"Ошибка обработки шарда {shard}: {e}")
+        # Шард вернётся в очередь, пока не исчерпаны попытки
+        failed = shard.attempts >= settings.MOYSKLAD_SHARD_MAX_ATTEMPTS
+        shard.status = 'error' if failed else 'pending'
+        try:
+            save_shard(
+                shard,
+                status=shard.status,
+                error_message=str(e),
+                finished_at=timezone.now() if failed else None,
+            )
+        except LeaseLost as lost:
+            # Пока шард обрабатывался, аренда истекла: ошибку запишет новый владелец
+            logger.warning(str(lost))
+
+    return shard
+
+
+def fail_abandoned_shards(sync_log):
+    """Шарды с истёкшей арендой и исчерпанными попытками больше никто не возьмёт"""
+    return SyncShard.objects.filter(
+        sync_log=sync_log,
+        status='running',
+        lease_until__lt=timezone.now(),
+        attempts__gte=settings.MOYSKLAD_SHARD_MAX_ATTEMPTS,
+    ).update(status='error', error_message='Аренда истекла, попытки исчерпаны', finished_at=timezone.now())
+
+
+def wait_shards(api, sync_log, endpoint, worker, work=True, workers=None, interval=None):
+    """
+    Ожидание завершения всех шардов endpoint запуска sync_log. При work=True
+    координатор сам обрабатывает шарды наравне с run_shard_worker.
+    Возвращает число шардов с ошибкой.
+    """
+    interval = interval or settings.MOYSKLAD_SYNC_WORKER_INTERVAL
+    shards = SyncShard.objects.filter(sync_log=sync_log, endpoint=endpoint)
+
+    while True:
+        shard = claim_shard(worker, sync_log) if work else None
+        if shard is not None:
+            process_shard(api, shard, workers=workers)
+            continue
+
+        fail_abandoned_shards(sync_log)
+        if not shards.filter(status__in=['pending', 'running']).exists():
+            return shards.filter(status='error').count()
+        time.sleep(interval)
+
+
+def collect_shards(sync_log, endpoint, count_items=True):
+    """Сложение счётчиков шардов endpoint в sync_log"""
+    for shard in SyncShard.objects.filter(sync_log=sync_log, endpoint=endpoint):
+        sync_log.pages_processed += shard.pages_processed
+        if count_items:
+            sync_log.items_processed += shard.items_processed
+            sync_log.items_created += shard.items_created
+            sync_log.items_updated += shard.items_updated
+            sync_log.items_unchanged += shard.items_unchanged
+        for target, counts in shard.stats.items():
+            sync_log.add_stats(target, **counts)
+
+
+def sync_products_sharded(api, sync_log, worker, work=True, stock=False, workers=None):
+    """
+    Полная синхронизация каталога, распределённая по шардам entity/product
+    (и report/stock/bystore при stock=True) между обработчиками на всех узлах.
+
+    После обработки всех шардов, как и при обычном полном запуске, сдвигается
+    метка SyncState и снимаются с активности товары, не полученные запуском —
+    если число товаров в МойСклад не изменилось с момента разбиения на шарды.
+    Координатор держит ту же блокировку синхронизации товаров, что задания,
+    планировщик и sync_all: иначе запуск по расписанию или вебхук во время
+    обхода перепишут поколение товаров, и очистка снимет их с активности.
+    """
+    with advisory_lock(get_sync_lock_name('products'), wait=True):
+        sync_log.is_full = True
+        # Шарды читают диапазоны смещений в разное время: без устойчивого
+        # порядка строки смещаются между шардами и пропускаются
+        size = plan_shards(api, sync_log, PRODUCTS_ENDPOINT, params={'order': FULL_SYNC_ORDER})
+        sync_log.save()
+
+        failed = wait_shards(api, sync_log, PRODUCTS_ENDPOINT, worker, work=work, workers=workers)
+        collect_shards(sync_log, PRODUCTS_ENDPOINT)
+        if failed:
+            raise RuntimeError(f"{PRODUCTS_ENDPOINT}: шардов с ошибкой: {failed}")
+
+        state, _ = SyncState.objects.get_or_create(sync_type='products')
+        watermark = SyncShard.objects.filter(
+            sync_log=sync_log, endpoint=PRODUCTS_ENDPOINT
+        ).aggregate(watermark=Max('watermark'))['watermark']
+        state.watermark = cap_watermark(max(state.watermark or '', watermark or '') or None, sync_log)
+        state.last_full_sync = sync_log.started_at
+        state.save()
+
+        # Если каталог изменился во время обхода, диапазоны шардов могли сдвинуться
+        current = api.get_size(PRODUCTS_ENDPOINT)
+        if current == size:
+            CatalogPipeline(api, sync_log).sweep(expected=current)
+        else:
+            logger.warning(
+                f"{PRODUCTS_ENDPOINT}: число товаров изменилось во время обхода "
+                f"({size} → {current}), очистка удалённых пропущена"
+            )
+
+        if stock:
+            sync_warehouses(api)
+            plan_shards(api, sync_log, STORE_STOCK_ENDPOINT)
+            failed = wait_shards(api, sync_log, STORE_STOCK_ENDPOINT, worker, work=work, workers=workers)
+            # Счётчики items_* относятся к товарам, остатки учитываются только в stats
+            collect_shards(sync_log, STORE_STOCK_ENDPOINT, count_items=False)
+            if failed:
+                raise RuntimeError(f"{STORE_STOCK_ENDPOINT}: шардов с ошибкой: {failed}")
+
+    return sync_log
@@ -0,0 +1,128 @@
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from integration.models import Product, SyncState
+from integration.services.checkpoint import iter_checkpointed
+from integration.services.utils import chunks
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_product_id(href):
+    """ID товара из meta.href строки отчёта (None для услуг, комплектов и т.п.)"""
+    if '/product/' not in href:
+        return None
+    return href.split('/product/')[-1].split('?')[0]
+
+
+def save_stock(rows):
+    """Пакетная запись строк отчёта report/stock/all, возвращает (обновлено, не найдено)"""
+    stock = {}
+    for item in rows:
+        moysklad_id = get_product_id(item.get('meta', {}).get('href', ''))
+        if moysklad_id:
+            stock[moysklad_id] = {
+                'stock': int(item.get('stock') or 0),
+                'reserve': int(item.get('reserve') or 0),
+            }
+
+    return save_stock_values(stock)
+
+
+def save_stock_values(stock):
+    """
+    Пакетная запись остатков {moysklad_id: {'stock': ..., 'reserve': ...}},
+    возвращает (обновлено, не найдено). Отсутствующие ключи не меняются.
+
+    На пачку выполняется один SELECT по moysklad_id и один bulk_update
+    только для товаров, у которых stock/reserve действительно изменились.
+    """
+    items_updated = 0
+    items_missing = 0
+    now = timezone.now()
+
+    with transaction.atomic():
+        for batch in chunks(list(stock), settings.MOYSKLAD_SYNC_BATCH_SIZE):
+            products = Product.objects.filter(moysklad_id__in=batch).only(
+                'id', 'moysklad_id', 'stock', 'reserve'
+            )
+
+            changed = []
+            for product in products:
+                values = stock[product.moysklad_id]
+                new_stock = values.get('stock', product.stock)
+                new_reserve = values.get('reserve', product.reserve)
+                if (product.stock, product.reserve) != (new_stock, new_reserve):
+                    product.stock = new_stock
+                    product.reserve = new_reserve
+                    product.last_sync = now
+                    changed.append(product)
+
+            if changed:
+                Product.objects.bulk_update(changed, ['stock', 'reserve', 'last_sync'])
+
+            items_updated += len(changed)
+            items_missing += len(batch) - len(products)
+
+    if items_missing:
+        logger.warning(f"Остатки: {items_missing} позиций не найдено среди товаров")
+
+    return items_updated, items_missing
+
+
+def sync_stock(api, sync_log, workers=None, checkpoint=None):
+    """
+    Синхронизация остатков integration.Product из отчёта report/stock/all.
+
+    Отчёт читается постранично (параллельно, как и товары), каждая страница
+    записывается сразу после загрузки, checkpoint — точка прерванного запуска.
+    """
+    pages = iter_checkpointed(
+        api, sync_log, 'report/stock/all', workers=workers, checkpoint=checkpoint
+    )
+    for _, rows in pages:
+        items_updated, _ = save_stock(rows)
+
+        sync_log.pages_processed += 1
+        sync_log.items_processed += len(rows)
+        sync_log.items_updated += items_updated
+
+    return sync_log
+
+
+def sync_current_stock(api, sync_log, full=False):
+    """
+    Лёгкое обновление остатков через report/stock/all/current.
+
+    Запрашиваются только позиции, изменившиеся с прошлого запуска
+    (changedSince по метке SyncState), поэтому опрос можно делать раз в минуту.
+    full=True или отсутствие метки — полный срез текущих остатков.
+    """
+    state, _ = SyncState.objects.get_or_create(sync_type='stock')
+    changed_since = None if full else state.watermark
+
+    # Метка — момент начала запроса во времени аккаунта, изменения во время
+    # выгрузки попадут в следующий запуск
+    started = timezone.localtime(timezone=ZoneInfo(settings.MOYSKLAD_TIMEZONE))
+    sync_log.is_full = changed_since is None
+
+    stock = {}
+    for stock_type in ('stock', 'reserve'):
+        rows = api.get_current_stock(stock_type, changed_since=changed_since)
+        for item in rows:
+            values = stock.setdefault(item['assortmentId'], {})
+            values[stock_type] = int(item.get(stock_type) or 0)
+
+    items_updated, _ = save_stock_values(stock)
+
+    sync_log.pages_processed += 1
+    sync_log.items_processed += len(stock)
+    sync_log.items_updated += items_updated
+
+    state.watermark = started.strftime('%Y-%m-%d %H:%M:%S')
+    state.save()
+
+    return sync_log
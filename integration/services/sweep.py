@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_unseen(model, generation, expected=None):
+    """
+    Снятие с активности товаров, не полученных полным запуском generation.
+
+    Выполняется одним UPDATE. Защита от частичного запуска: если запуск
+    получил меньше expected товаров (meta.size коллекции МойСклад на момент
+    очистки) или меньше MOYSKLAD_SWEEP_MIN_RATIO от числа активных товаров,
+    ничего не удаляется. Возвращает число снятых товаров или None, если
+    очистка пропущена.
+    """
+    seen = model.objects.filter(sync_generation=generation).count()
+    active = model.objects.filter(removed_at__isnull=True).count()
+
+    if expected is not None and seen < expected:
+        logger.warning(
+            f"{model._meta.label}: получено {seen} товаров, в МойСклад {expected}, "
+            f"очистка удалённых пропущена"
+        )
+        return None
+
+    if not seen or seen < active * settings.MOYSKLAD_SWEEP_MIN_RATIO:
+        logger.warning(
+            f"{model._meta.label}: получено {seen} из {active} товаров, "
+            f"очистка удалённых пропущена"
+        )
+        return None
+
+    return model.objects.filter(removed_at__isnull=True).exclude(
+        sync_generation=generation
+    ).update(is_active=False, removed_at=timezone.now())
+
+
+def mark_removed(model, ids):
+    """Снятие с активности товаров, удалённых в МойСклад (по событию вебхука)"""
+    return model.objects.filter(moysklad_id__in=ids, removed_at__isnull=True).update(
+        is_active=False, removed_at=timezone.now()
+    )
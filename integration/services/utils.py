@@ -0,0 +1,40 @@
+import hashlib
+import json
+
+
+def chunks(items, size):
+    """Разбиение списка на пачки по size элементов"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def get_content_hash(data):
+    """SHA-256 нормализованного JSON (ключи отсортированы), для поиска изменений"""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def split_by_hash(model, hashes):
+    """
+    Разделение {moysklad_id: хэш} на (новые, изменённые, без изменений)
+    одним запросом к model по moysklad_id.
+    """
+    stored = dict(
+        model.objects.filter(moysklad_id__in=list(hashes)).values_list('moysklad_id', 'content_hash')
+    )
+    created, changed, unchanged = [], [], []
+    for moysklad_id, content_hash in hashes.items():
+        if moysklad_id not in stored:
+            created.append(moysklad_id)
+        elif stored[moysklad_id] != content_hash:
+            changed.append(moysklad_id)
+        else:
+            unchanged.append(moysklad_id)
+    return created, changed, unchanged
+
+
+def restore_removed(model, ids):
+    """Товары, снова появившиеся в МойСклад после удаления, возвращаются в активные"""
+    return model.objects.filter(moysklad_id__in=ids, removed_at__isnull=False).update(
+        removed_at=None, is_active=True
+    )
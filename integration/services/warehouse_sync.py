@@ -0,0 +1,191 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from inventory.models import Stock, Warehouse
+from products.models import Product
+from integration.services.checkpoint import iter_checkpointed
+from integration.services.copy_load import copy_upsert, use_copy_load
+from integration.services.stock_sync import save_stock_values
+from integration.services.utils import chunks
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_entity_id(href):
+    """ID сущности из meta.href (последний сегмент пути без параметров)"""
+    return href.split('?')[0].rstrip('/').split('/')[-1]
+
+
+def sync_warehouses(api):
+    """
+    Загрузка складов МойСклад в inventory.Warehouse одним upsert по moysklad_id.
+
+    Обновляется только название: активность, сортировка и склад по умолчанию
+    настраиваются вручную в админке. Возвращает карту moysklad_id → pk.
+    """
+    warehouses = [
+        Warehouse(
+            moysklad_id=store['id'],
+            name=store.get('name', '')[:100],
+            is_active=not store.get('archived', False),
+        )
+        for rows in api.iter_pages('entity/store')
+        for store in rows
+    ]
+
+    Warehouse.objects.bulk_create(
+        warehouses,
+        update_conflicts=True,
+        unique_fields=['moysklad_id'],
+        update_fields=['name', 'updated_at'],
+    )
+
+    return dict(Warehouse.objects.values_list('moysklad_id', 'id'))
+
+
+def save_store_stock(rows, warehouse_ids):
+    """
+    Запись страницы отчёта report/stock/bystore в inventory.Stock.
+
+    Товары страницы разрешаются одним запросом, существующие остатки читаются
+    одним запросом на пачку, записываются только новые и изменившиеся пары
+    (товар, склад) через INSERT ... ON CONFLICT.
+    Возвращает (создано, обновлено, без изменений).
+    """
+    quantities = {}
+    for item in rows:
+        product_id = get_entity_id(item.get('meta', {}).get('href', ''))
+        for store in item.get('stockByStore', []):
+            warehouse_id = warehouse_ids.get(get_entity_id(store.get('meta', {}).get('href', '')))
+            if warehouse_id:
+                quantities[(product_id, warehouse_id)] = (
+                    int(store.get('stock') or 0),
+                    int(store.get('reserve') or 0),
+                )
+
+    product_ids = dict(
+        Product.objects.filter(
+            moysklad_id__in={product_id for product_id, _ in quantities}
+        ).values_list('moysklad_id', 'id')
+    )
+
+    keys = [key for key in quantities if key[0] in product_ids]
+    now = timezone.now()
+
+    if use_copy_load():
+        return copy_upsert(
+            Stock,
+            [
+                Stock(
+                    product_id=product_ids[product_id],
+                    warehouse_id=warehouse_id,
+                    quantity=quantities[(product_id, warehouse_id)][0],
+                    reserve=quantities[(product_id, warehouse_id)][1],
+                )
+                for product_id, warehouse_id in keys
+            ],
+            unique_fields=['product', 'warehouse'],
+            update_fields=['quantity', 'reserve', 'updated_at'],
+            compare_fields=['quantity', 'reserve'],
+        )
+
+    items_created = 0
+    items_updated = 0
+    items_unchanged = 0
+
+    with transaction.atomic():
+        for batch in chunks(keys, settings.MOYSKLAD_SYNC_BATCH_SIZE):
+            existing = {
+                (product_id, warehouse_id): (quantity, reserve)
+                for product_id, warehouse_id, quantity, reserve in Stock.objects.filter(
+                    product_id__in={product_ids[product_id] for product_id, _ in batch},
+                ).values_list('product_id', 'warehouse_id', 'quantity', 'reserve')
+            }
+
+            changed = []
+            for product_id, warehouse_id in batch:
+                pk = product_ids[product_id]
+                values = quantities[(product_id, warehouse_id)]
+                current = existing.get((pk, warehouse_id))
+                if current == values:
+                    items_unchanged += 1
+                    continue
+
+                if current is None:
+                    items_created += 1
+                else:
+                    items_updated += 1
+                changed.append(Stock(
+                    product_id=pk,
+                    warehouse_id=warehouse_id,
+                    quantity=values[0],
+                    reserve=values[1],
+                    updated_at=now,
+                ))
+
+            if changed:
+                Stock.objects.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=['product', 'warehouse'],
+                    update_fields=['quantity', 'reserve', 'updated_at'],
+                )
+
+    missing = len({product_id for product_id, _ in quantities} - set(product_ids))
+    if missing:
+        logger.warning(f"Остатки по складам: {missing} товаров не найдено в products.Product")
+
+    return items_created, items_updated, items_unchanged
+
+
+def get_total_stock(rows):
+    """Суммарные остатки по всем складам для integration.Product"""
+    stock = {}
+    for item in rows:
+        product_id = get_entity_id(item.get('meta', {}).get('href', ''))
+        stores = item.get('stockByStore', [])
+        stock[product_id] = {
+            'stock': sum(int(store.get('stock') or 0) for store in stores),
+            'reserve': sum(int(store.get('reserve') or 0) for store in stores),
+        }
+    return stock
+
+
+def save_store_stock_page(rows, warehouse_ids, sync_log):
+    """
+    Запись страницы отчёта по складам: inventory.Stock и из тех же строк
+    в той же транзакции суммарные остатки integration.Product, так что
+    отдельный запрос report/stock/all не нужен. Возвращает
+    (создано, обновлено, без изменений) для inventory.Stock.
+    """
+    with transaction.atomic():
+        created, updated, unchanged = save_store_stock(rows, warehouse_ids)
+        total_updated, _ = save_stock_values(get_total_stock(rows))
+
+    sync_log.pages_processed += 1
+    sync_log.add_stats('inventory.Stock', created=created, updated=updated, unchanged=unchanged)
+    sync_log.add_stats('integration.Product.stock', updated=total_updated)
+
+    return created, updated, unchanged
+
+
+def sync_store_stock(api, sync_log, workers=None, warehouse_ids=None, checkpoint=None):
+    """
+    Синхронизация складов и остатков по складам (inventory.Warehouse / inventory.Stock),
+    checkpoint — точка прерванного запуска
+    """
+    warehouse_ids = warehouse_ids or sync_warehouses(api)
+
+    pages = iter_checkpointed(
+        api, sync_log, 'report/stock/bystore', workers=workers, checkpoint=checkpoint
+    )
+    for _, rows in pages:
+        created, updated, unchanged = save_store_stock_page(rows, warehouse_ids, sync_log)
+
+        sync_log.items_processed += len(rows)
+        sync_log.items_created += created
+        sync_log.items_updated += updated
+        sync_log.items_unchanged += unchanged
+
+    return sync_log
@@ -0,0 +1,227 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from integration.models import Order, Product, SyncLog, WebhookEvent
+from integration.services.locks import advisory_lock, get_sync_lock_name
+from integration.services.order_sync import ORDERS_ENDPOINT, save_orders
+from integration.services.pipeline import CatalogPipeline
+from integration.services.product_sync import PRODUCTS_ENDPOINT
+from integration.services.stock_sync import sync_current_stock
+from integration.services.sweep import mark_removed
+from integration.services.utils import chunks
+from integration.services.warehouse_sync import get_entity_id
+from products.models import Product as PimProduct
+import logging
+
+logger = logging.getLogger(__name__)
+
+ENTITY_TYPES = {entity_type for entity_type, _ in WebhookEvent.ENTITY_TYPES}
+
+
+def parse_webhook(payload):
+    """
+    События из тела вебхука МойСклад. Вебхук сущностей содержит список events
+    с meta и action, вебхук остатков — ссылку reportUrl на изменившиеся остатки.
+    Неподдерживаемые типы сущностей пропускаются.
+    """
+    if payload.get('reportUrl'):
+        return [WebhookEvent(entity_type='stock', action='UPDATE', payload=payload)]
+
+    events = []
+    for event in payload.get('events', []):
+        meta = event.get('meta', {})
+        if meta.get('type') not in ENTITY_TYPES or event.get('action') not in ('CREATE', 'UPDATE', 'DELETE'):
+            continue
+        events.append(WebhookEvent(
+            entity_type=meta['type'],
+            action=event['action'],
+            moysklad_id=get_entity_id(meta.get('href', '')),
+            payload=event,
+        ))
+    return events
+
+
+def save_webhook(payload):
+    """Сохранение событий вебхука в очередь одним INSERT, возвращает число событий"""
+    return len(WebhookEvent.objects.bulk_create(parse_webhook(payload)))
+
+
+def get_latest_actions(events, entity_type):
+    """Схлопывание событий по ID: {moysklad_id: последнее действие}"""
+    return {
+        event.moysklad_id: event.action
+        for event in events
+        if event.entity_type == entity_type and event.moysklad_id
+    }
+
+
+def fetch_changed(api, endpoint, actions):
+    """
+    Загрузка сущностей из событий пачками по MOYSKLAD_WEBHOOK_FETCH_BATCH ID,
+    отдаёт страницы строк. Действие события — только подсказка: удалёнными
+    (DELETE в actions) считаются ровно те ID, которых МойСклад не вернул,
+    а сущности из событий DELETE, которые МойСклад вернул, записываются
+    как изменившиеся.
+    """
+    for batch in chunks(list(actions), settings.MOYSKLAD_WEBHOOK_FETCH_BATCH):
+        rows = list(api.iter_by_ids(endpoint, batch))
+        found = {row['id'] for row in rows}
+        for moysklad_id in batch:
+            actions[moysklad_id] = 'UPDATE' if moysklad_id in found else 'DELETE'
+        if rows:
+            yield rows
+
+
+def apply_products(api, sync_log, actions):
+    pipeline = CatalogPipeline(api, sync_log)
+    pipeline.load_references()
+
+    for rows in fetch_changed(api, PRODUCTS_ENDPOINT, actions):
+        created, updated, unchanged = pipeline.save_products_page(rows)
+        sync_log.items_processed += len(rows)
+        sync_log.items_created += created
+        sync_log.items_updated += updated
+        sync_log.items_unchanged += unchanged
+
+    deleted = [moysklad_id for moysklad_id, action in actions.items() if action == 'DELETE']
+    if deleted:
+        sync_log.add_stats('integration.Product', removed=mark_removed(Product, deleted))
+        sync_log.add_stats('products.Product', removed=mark_removed(PimProduct, deleted))
+
+
+def apply_orders(api, sync_log, actions):
+    for rows in fetch_changed(api, ORDERS_ENDPOINT, actions):
+        created, updated = save_orders(rows)
+        sync_log.add_stats('integration.Order', created=created, updated=updated)
+
+    deleted = [moysklad_id for moysklad_id, action in actions.items() if action == 'DELETE']
+    if deleted:
+        cancelled = Order.objects.filter(moysklad_id__in=deleted).update(status='cancelled')
+        sync_log.add_stats('integration.Order', cancelled=cancelled)
+
+
+def apply_events(api, sync_log, events):
+    """
+    Применение пачки событий: по каждой сущности берётся последнее действие,
+    изменившиеся сущности загружаются пачками по ID, удалённые снимаются
+    с активности; события остатков схлопываются в один запрос изменений
+    report/stock/all/current.
+
+    Товары записываются под блокировкой синхронизации товаров: во время полного
+    запуска запись с чужим поколением сняла бы товар с активности при очистке.
+    Если блокировка занята, события товаров откладываются; возвращается
+    список отложенных событий.
+    """
+    deferred = []
+    products = get_latest_actions(events, 'product')
+    if products:
+        with advisory_lock(get_sync_lock_name('products')) as acquired:
+            if acquired:
+                apply_products(api, sync_log, products)
+            else:
+                deferred = [event for event in events if event.entity_type == 'product']
+                logger.info(f"Вебхуки: синхронизация товаров выполняется, отложено событий: {len(deferred)}")
+
+    orders = get_latest_actions(events, 'customerorder')
+    if orders:
+        apply_orders(api, sync_log, orders)
+
+    if any(event.entity_type == 'stock' for event in events):
+        sync_current_stock(api, sync_log)
+
+    return deferred
+
+
+def claim_events(limit=None):
+    """
+    Захват пачки событий. События блокируются через SKIP LOCKED только на время
+    захвата: они переводятся в processing с арендой до next_attempt_at
+    (MOYSKLAD_WEBHOOK_LEASE_SECONDS), и если обработчик упадёт, после этого
+    срока их заберёт другой обработчик.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'processing'])
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .order_by('id')[:limit or settings.MOYSKLAD_WEBHOOK_BATCH_SIZE]
+        )
+        lease = now + timedelta(seconds=settings.MOYSKLAD_WEBHOOK_LEASE_SECONDS)
+        for event in events:
+            event.status = 'processing'
+            event.attempts += 1
+            event.next_attempt_at = lease
+        WebhookEvent.objects.bulk_update(events, ['status', 'attempts', 'next_attempt_at'])
+    return events
+
+
+def finish_events(events, lease, error=None, deferred=()):
+    """
+    Запись результата пачки. Записываются только события, аренда которых всё
+    ещё у этого обработчика (срок аренды не истёк и их не забрал другой).
+    При ошибке события возвращаются в очередь, пока не исчерпаны попытки.
+    Отложенные события возвращаются в очередь на MOYSKLAD_WEBHOOK_DEFER_SECONDS
+    без учёта попытки.
+    """
+    now = timezone.now()
+    deferred = {event.pk for event in deferred}
+    for event in events:
+        event.error_message = error
+        event.next_attempt_at = None
+        if event.pk in deferred:
+            event.status = 'pending'
+            event.attempts -= 1
+            event.next_attempt_at = now + timedelta(seconds=settings.MOYSKLAD_WEBHOOK_DEFER_SECONDS)
+        elif error is None:
+            event.status = 'done'
+        elif event.attempts >= settings.MOYSKLAD_WEBHOOK_MAX_ATTEMPTS:
+            event.status = 'error'
+        else:
+            event.status = 'pending'
+        event.processed_at = now if event.status != 'pending' else None
+
+    with transaction.atomic():
+        owned = set(
+            WebhookEvent.objects.select_for_update()
+            .filter(pk__in=[event.pk for event in events], status='processing', next_attempt_at=lease)
+            .values_list('pk', flat=True)
+        )
+        if len(owned) < len(events):
+            logger.warning(f"Вебхуки: аренда {len(events) - len(owned)} событий истекла, результат не записан")
+        WebhookEvent.objects.bulk_update(
+            [event for event in events if event.pk in owned],
+            ['status', 'attempts', 'error_message', 'next_attempt_at', 'processed_at'],
+        )
+
+
+def process_webhook_batch(api):
+    """
+    Разбор очередной пачки событий, возвращает SyncLog или None, если очередь пуста.
+
+    Пачка захватывается короткой транзакцией (claim_events), так что обработчиков
+    может быть несколько, а запросы к МойСклад и запись данных идут вне её.
+    """
+    events = claim_events()
+    if not events:
+        return None
+    lease = events[0].next_attempt_at
+
+    sync_log = SyncLog.start('webhooks')
+    sync_log.is_full = False
+    deferred = []
+    try:
+        deferred = apply_events(api, sync_log, events)
+        sync_log.finish()
+        error = None
+
+    except Exception as e:
+        logger.error(f"Ошибка разбора вебхуков: {e}")
+        sync_log.finish(error=e)
+        error = str(e)
+
+    finish_events(events, lease, error, deferred=deferred)
+    return sync_log
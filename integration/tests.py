@@ -0,0 +1,354 @@
+import io
+import threading
+from unittest import mock
+
+import requests
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from products.models import Product as PimProduct
+from integration.models import Order, SyncLog, SyncShard
+from integration.services.checkpoint import iter_checkpointed
+from integration.services.json_codec import dumps, loads
+from integration.services.locks import advisory_lock, get_sync_lock_name
+from integration.services.moysklad_api import MoySkladAPI
+from integration.services.order_push import create_outbound_order, push_orders
+from integration.services.order_sync import save_orders
+from integration.services.pim_sync import save_pim_products
+from integration.services.sharding import SHARD_HANDLERS, claim_shard, process_shard
+
+
+def make_product_row(moysklad_id, code, name='Товар'):
+    return {'id': moysklad_id, 'code': code, 'name': name}
+
+
+def hold_lock(name):
+    """Блокировка в другом потоке (своё соединение), снимается вызовом результата"""
+    acquired, release = threading.Event(), threading.Event()
+
+    def hold():
+        try:
+            with advisory_lock(name):
+                acquired.set()
+                release.wait(10)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    acquired.wait(10)
+
+    def stop():
+        release.set()
+        thread.join()
+
+    return stop
+
+
+class SavePimProductsSkuTest(TestCase):
+    """Уникальность SKU при записи страницы товаров в products.Product"""
+
+    def save(self, *rows):
+        return save_pim_products(list(rows), {})
+
+    def get_skus(self):
+        return dict(PimProduct.objects.values_list('moysklad_id', 'sku'))
+
+    def test_products_swap_skus_in_one_batch(self):
+        self.save(make_product_row('a', 'X'), make_product_row('b', 'Y'))
+
+        self.save(make_product_row('a', 'Y', 'A2'), make_product_row('b', 'X', 'B2'))
+
+        self.assertEqual(self.get_skus(), {'a': 'Y', 'b': 'X'})
+
+    def test_new_product_takes_sku_released_in_same_batch(self):
+        self.save(make_product_row('a', 'X'))
+
+        self.save(make_product_row('c', 'X'), make_product_row('a', 'Z', 'A2'))
+
+        self.assertEqual(self.get_skus(), {'a': 'Z', 'c': 'X'})
+
+    def test_owner_keeps_sku_claimed_by_new_product(self):
+        self.save(make_product_row('a', 'X'))
+
+        self.save(make_product_row('c', 'X'), make_product_row('a', 'X', 'A2'))
+
+        self.assertEqual(self.get_skus(), {'a': 'X', 'c': 'c'})
+
+    def test_sku_taken_outside_batch_falls_back_to_id(self):
+        self.save(make_product_row('a', 'X'))
+
+        self.save(make_product_row('c', 'X'))
+
+        self.assertEqual(self.get_skus(), {'a': 'X', 'c': 'c'})
+
+
+class SyncLogResumeTest(TestCase):
+    """Выбор прерванного запуска для SyncLog.start(resume=True)"""
+
+    def make_log(self, status, checkpoint=None, **fields):
+        return SyncLog.objects.create(sync_type='products', status=status, checkpoint=checkpoint or {}, **fields)
+
+    def test_resumes_killed_run(self):
+        killed = self.make_log('started', {'offset': 2000})
+
+        log = SyncLog.start('products', resume=True)
+
+        self.assertEqual(log.pk, killed.pk)
+        self.assertEqual(log.checkpoint, {'offset': 2000})
+
+    def test_resumes_failed_run(self):
+        failed = self.make_log('error', {'offset': 1000}, error_message='timeout')
+
+        log = SyncLog.start('products', resume=True)
+
+        self.assertEqual(log.pk, failed.pk)
+        self.assertEqual(log.status, 'started')
+        self.assertIsNone(log.error_message)
+
+    def test_running_run_is_not_resumed(self):
+        running = self.make_log('started', {'offset': 2000})
+        release = hold_lock(get_sync_lock_name('products'))
+        try:
+            log = SyncLog.start('products', resume=True)
+        finally:
+            release()
+
+        self.assertNotEqual(log.pk, running.pk)
+        self.assertEqual(log.checkpoint, {})
+
+    def test_skipped_and_poll_logs_are_ignored(self):
+        failed = self.make_log('error', {'offset': 1000})
+        self.make_log('skipped')
+        self.make_log('success', is_full=False)
+
+        log = SyncLog.start('products', resume=True)
+
+        self.assertEqual(log.pk, failed.pk)
+
+    def test_run_without_checkpoint_is_not_resumed(self):
+        failed = self.make_log('error')
+
+        log = SyncLog.start('products', resume=True)
+
+        self.assertNotEqual(log.pk, failed.pk)
+
+    def test_run_followed_by_success_is_not_resumed(self):
+        failed = self.make_log('error', {'offset': 1000})
+        self.make_log('success')
+
+        log = SyncLog.start('products', resume=True)
+
+        self.assertNotEqual(log.pk, failed.pk)
+
+
+class SyncCommandLockTest(TestCase):
+    """Команды синхронизации для cron не запускаются параллельно с такой же синхронизацией"""
+
+    def test_store_stock_skipped_while_stock_sync_runs(self):
+        release = hold_lock(get_sync_lock_name('stock'))
+        try:
+            call_command('sync_store_stock', stdout=io.StringIO())
+        finally:
+            release()
+
+        self.assertEqual(
+            list(SyncLog.objects.values_list('sync_type', 'status')),
+            [('store_stock', 'skipped')],
+        )
+
+
+class ShardAPI:
+    """Страницы шарда; после первой страницы шард забирает другой обработчик"""
+
+    def __init__(self, shard, error=None):
+        self.shard = shard
+        self.error = error
+
+    def iter_pages(self, endpoint, **kwargs):
+        yield [{'id': 'a'}]
+        SyncShard.objects.filter(pk=self.shard.pk).update(worker='other', attempts=self.shard.attempts + 1)
+        if self.error:
+            raise self.error
+        yield [{'id': 'b'}]
+
+
+@mock.patch.dict(SHARD_HANDLERS, {'entity/product': lambda api, sync_log: lambda rows: (len(rows), 0, 0)})
+class ProcessShardLeaseTest(TestCase):
+    """Шард, аренду которого забрал другой обработчик"""
+
+    def setUp(self):
+        sync_log = SyncLog.start('products')
+        SyncShard.objects.create(sync_log=sync_log, endpoint='entity/product', offset=0, size=2, limit=1)
+        self.shard = claim_shard('worker')
+
+    def test_progress_after_lease_lost_is_dropped(self):
+        shard = process_shard(ShardAPI(self.shard), self.shard)
+
+        stored = SyncShard.objects.get(pk=shard.pk)
+        self.assertEqual((stored.worker, stored.status, stored.pages_processed), ('other', 'running', 1))
+
+    def test_error_after_lease_lost_does_not_raise(self):
+        shard = process_shard(ShardAPI(self.shard, error=ConnectionError('timeout')), self.shard)
+
+        stored = SyncShard.objects.get(pk=shard.pk)
+        self.assertEqual((stored.worker, stored.status, stored.error_message), ('other', 'running', None))
+
+
+class JsonCodecTest(TestCase):
+    """Одинаковая сериализация при обоих значениях MOYSKLAD_JSON_BACKEND"""
+
+    def test_non_string_keys(self):
+        for backend in ['json', 'orjson']:
+            with self.subTest(backend=backend), override_settings(MOYSKLAD_JSON_BACKEND=backend):
+                self.assertEqual(dumps({1: 'a', 'b': {2: 'c'}}), b'{"1":"a","b":{"2":"c"}}')
+
+
+class StreamAPI(MoySkladAPI):
+    """Коллекция из rows, страницы отдаются без HTTP"""
+
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = rows
+
+    def _stream_page(self, endpoint, limit, offset, params=None):
+        yield from self.rows[offset:offset + limit]
+
+
+@override_settings(MOYSKLAD_STREAM_JSON=True, MOYSKLAD_PAGE_SIZE=5, MOYSKLAD_SYNC_BATCH_SIZE=2)
+class StreamCheckpointTest(TestCase):
+    """Потоковый обход частями меньше страницы и контрольные точки на границах страниц"""
+
+    def test_batches_and_page_checkpoints(self):
+        sync_log = SyncLog.start('stock')
+        rows = [{'id': str(n)} for n in range(12)]
+        offsets = []
+
+        with mock.patch.object(SyncLog, 'save_checkpoint', lambda self, **point: offsets.append(point['offset'])):
+            pages = list(iter_checkpointed(StreamAPI(rows), sync_log, 'report/stock/all'))
+
+        self.assertEqual([(page, len(batch)) for page, batch in pages], [
+            (1, 2), (1, 2), (1, 1), (2, 2), (2, 2), (2, 1), (3, 2),
+        ])
+        self.assertEqual([row for _, batch in pages for row in batch], rows)
+        self.assertEqual(offsets, [5, 10])
+
+    def test_resume_from_checkpoint(self):
+        sync_log = SyncLog.start('stock')
+        rows = [{'id': str(n)} for n in range(12)]
+        checkpoint = {'entity': 'report/stock/all', 'params': {}, 'limit': 5, 'offset': 5, 'page': 1}
+
+        pages = list(iter_checkpointed(StreamAPI(rows), sync_log, 'report/stock/all', checkpoint=checkpoint))
+
+        self.assertEqual([row for _, batch in pages for row in batch], rows[5:])
+        self.assertEqual(sync_log.checkpoint['offset'], 10)
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.content = dumps(body)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f'HTTP {self.status_code}')
+
+
+class BatchAPI(MoySkladAPI):
+    """Массовый POST: запрос с элементом bad отклоняется целиком с кодом status"""
+
+    def __init__(self, status=400):
+        super().__init__()
+        self.status = status
+        self.requests = []
+
+    def _send(self, method, endpoint, data=None, **kwargs):
+        batch = loads(data)
+        self.requests.append([item['name'] for item in batch])
+        if any(item['name'] == 'bad' for item in batch):
+            return FakeResponse(self.status, {'errors': [{'error': 'Некорректный элемент'}]})
+        return FakeResponse(200, [{'id': f"id-{item['name']}", **item} for item in batch])
+
+
+class PostBatchTest(TestCase):
+    """Деление пачки post_batch, если МойСклад отклоняет запрос целиком"""
+
+    def test_rejected_request_is_bisected_to_bad_item(self):
+        api = BatchAPI()
+        items = [{'name': name} for name in ['a', 'b', 'bad', 'c']]
+
+        results = api.post_batch('entity/customerorder', items)
+
+        self.assertEqual(
+            [(item['name'], data and data['id'], errors) for item, data, errors in results],
+            [('a', 'id-a', None), ('b', 'id-b', None), ('bad', None, [{'error': 'Некорректный элемент'}]), ('c', 'id-c', None)],
+        )
+        self.assertEqual(api.requests, [['a', 'b', 'bad', 'c'], ['a', 'b'], ['bad', 'c'], ['bad'], ['c']])
+
+    def test_server_error_is_raised(self):
+        api = BatchAPI(status=500)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            api.post_batch('entity/customerorder', [{'name': 'a'}, {'name': 'bad'}])
+
+        self.assertEqual(len(api.requests), 1)
+
+
+class OrderAPI:
+    """Заказы МойСклад в памяти; before_response вызывается после создания, до ответа"""
+
+    def __init__(self, before_response=None):
+        self.orders = []
+        self.before_response = before_response
+
+    def iter_by_field(self, endpoint, field, values, workers=1):
+        return [order for order in self.orders if order['externalCode'] in values]
+
+    def create_orders(self, items):
+        results = []
+        for item in items:
+            order = {'id': f'ms-{len(self.orders) + 1}', 'moment': '2026-01-01 00:00:00.000', **item}
+            self.orders.append(order)
+            results.append((item, order, None))
+        if self.before_response:
+            self.before_response(self)
+        return results
+
+
+def lose_response(api):
+    raise ConnectionError('Соединение разорвано')
+
+
+class OrderPushTest(TestCase):
+    """Повторная отправка заказов из исходящей очереди не создаёт дублей в МойСклад"""
+
+    def setUp(self):
+        self.order = create_outbound_order(number='A-1', order_date=timezone.now())
+
+    def retry_now(self):
+        Order.objects.filter(pk=self.order.pk).update(next_push_at=timezone.now())
+
+    def test_lost_response_is_not_reposted(self):
+        api = OrderAPI(before_response=lose_response)
+        self.assertEqual(push_orders(api), (0, 1, 0))
+
+        api.before_response = None
+        self.retry_now()
+        self.assertEqual(push_orders(api), (1, 0, 0))
+
+        self.assertEqual(len(api.orders), 1)
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.moysklad_id, self.order.push_status), ('ms-1', 'sent'))
+
+    def test_order_linked_by_webhook_during_push(self):
+        def link_and_lose_response(api):
+            save_orders(api.orders)
+            lose_response(api)
+
+        push_orders(OrderAPI(before_response=link_and_lose_response))
+
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.moysklad_id, self.order.push_status), ('ms-1', 'sent'))
+        self.assertEqual(Order.objects.count(), 1)
@@ -7,10 +7,12 @@ router.register(r'products', views.ProductViewSet, basename='product')
 router.register(r'categories', views.ProductCategoryViewSet, basename='category')
 router.register(r'orders', views.OrderViewSet, basename='order')
 router.register(r'sync-logs', views.SyncLogViewSet, basename='synclog')
+router.register(r'sync-jobs', views.SyncJobViewSet, basename='syncjob')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('health/', views.health_check, name='health_check'),
     path('sync/products/', views.sync_products_manual, name='sync_products'),
     path('sync/stock/', views.sync_stock_manual, name='sync_stock'),
+    path('webhooks/moysklad/', views.moysklad_webhook, name='moysklad_webhook'),
 ]
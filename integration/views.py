@@ -1,10 +1,17 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from django.conf import settings
 from django.utils import timezone
-from .models import Product, ProductCategory, Order, SyncLog
-from .serializers import ProductSerializer, ProductCategorySerializer, OrderSerializer, SyncLogSerializer
-from .services.moysklad_api import MoySkladAPI
+from django.utils.crypto import constant_time_compare
+from .models import Product, ProductCategory, Order, SyncLog, SyncJob
+from .serializers import (
+    ProductSerializer, ProductCategorySerializer, OrderSerializer, SyncLogSerializer, SyncJobSerializer
+)
+from .services.order_push import create_outbound_order
+from .services.webhooks import save_webhook
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,6 +40,13 @@ class OrderViewSet(viewsets.ModelViewSet):
     search_fields = ['number', 'customer_name', 'customer_phone']
     ordering_fields = ['order_date', 'created_at']
 
+    def perform_create(self, serializer):
+        # Заказ без ID МойСклад сохраняется в исходящую очередь и отправляется push_orders
+        if serializer.validated_data.get('moysklad_id'):
+            serializer.save()
+        else:
+            serializer.instance = create_outbound_order(**serializer.validated_data)
+
 
 class SyncLogViewSet(viewsets.ReadOnlyModelViewSet):
     """API для просмотра логов синхронизации"""
@@ -42,6 +56,14 @@ class SyncLogViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['started_at']
 
 
+class SyncJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """API для просмотра заданий синхронизации и их прогресса"""
+    queryset = SyncJob.objects.select_related('sync_log')
+    serializer_class = SyncJobSerializer
+    filterset_fields = ['job_type', 'status']
+    ordering_fields = ['created_at']
+
+
 @api_view(['GET'])
 def health_check(request):
     """Проверка работоспособности сервиса"""
@@ -52,131 +74,72 @@ def health_check(request):
     })
 
 
+def enqueue_sync(request, job_type, **params):
+    """Постановка задания синхронизации в очередь, ответ 202 с ID задания"""
+    job, created = SyncJob.enqueue(job_type, **params)
+    return Response({
+        'success': True,
+        'job_id': job.pk,
+        'status': job.status,
+        'coalesced': not created,
+        'status_url': reverse('syncjob-detail', args=[job.pk], request=request)
+    }, status=status.HTTP_202_ACCEPTED)
+
+
 @api_view(['POST'])
 def sync_products_manual(request):
-    """Ручной запуск синхронизации товаров"""
-    try:
-        sync_log = SyncLog.objects.create(
-            sync_type='products',
-            status='started'
-        )
-        
-        api = MoySkladAPI()
-        products = api.sync_all_products()
-        
-        items_created = 0
-        items_updated = 0
-        
-        for product_data in products:
-            moysklad_id = product_data.get('id')
-            
-            price = 0
-            sale_prices = product_data.get('salePrices', [])
-            if sale_prices:
-                price = sale_prices[0].get('value', 0) / 100
-            
-            product_info = {
-                'name': product_data.get('name', ''),
-                'code': product_data.get('code'),
-                'article': product_data.get('article'),
-                'description': product_data.get('description'),
-                'price': price,
-                'archived': product_data.get('archived', False),
-                'external_code': product_data.get('externalCode'),
-                'raw_data': product_data,
-            }
-            
-            product, created = Product.objects.update_or_create(
-                moysklad_id=moysklad_id,
-                defaults=product_info
-            )
-            
-            if created:
-                items_created += 1
-            else:
-                items_updated += 1
-        
-        sync_log.status = 'success'
-        sync_log.items_processed = len(products)
-        sync_log.items_created = items_created
-        sync_log.items_updated = items_updated
-        sync_log.finished_at = timezone.now()
-        sync_log.save()
-        
-        return Response({
-            'success': True,
-            'created': items_created,
-            'updated': items_updated,
-            'total': len(products)
-        })
-        
-    except Exception as e:
-        logger.error(f"Ошибка синхронизации: {e}")
-        
-        if 'sync_log' in locals():
-            sync_log.status = 'error'
-            sync_log.error_message = str(e)
-            sync_log.finished_at = timezone.now()
-            sync_log.save()
-        
-        return Response({
-            'success': False,
-            'error': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    """
+    Постановка в очередь синхронизации товаров, PIM-карточек и цен
+    (full=true — полная выгрузка, with_stock=true — затем остатки по складам,
+    resume=true — продолжение прерванного запуска с контрольной точки).
+    Выполняется обработчиком run_sync_worker, прогресс — /api/sync-jobs/<id>/
+    """
+    return enqueue_sync(
+        request, 'products',
+        full=bool(request.data.get('full')),
+        with_stock=bool(request.data.get('with_stock')),
+        resume=bool(request.data.get('resume')),
+    )
 
 
 @api_view(['POST'])
 def sync_stock_manual(request):
-    """Ручной запуск синхронизации остатков"""
-    try:
-        sync_log = SyncLog.objects.create(
-            sync_type='stock',
-            status='started'
-        )
-        
-        api = MoySkladAPI()
-        stock_data = api.get_stock(limit=1000)
-        
-        items_updated = 0
-        
-        for item in stock_data.get('rows', []):
-            meta = item.get('meta', {})
-            href = meta.get('href', '')
-            if '/product/' in href:
-                moysklad_id = href.split('/product/')[-1]
-            else:
-                continue
-            
-            try:
-                product = Product.objects.get(moysklad_id=moysklad_id)
-                product.stock = item.get('stock', 0)
-                product.reserve = item.get('reserve', 0)
-                product.save(update_fields=['stock', 'reserve', 'last_sync'])
-                items_updated += 1
-            except Product.DoesNotExist:
-                logger.warning(f"Товар с ID {moysklad_id} не найден")
-        
-        sync_log.status = 'success'
-        sync_log.items_processed = len(stock_data.get('rows', []))
-        sync_log.items_updated = items_updated
-        sync_log.finished_at = timezone.now()
-        sync_log.save()
-        
+    """
+    Постановка в очередь синхронизации остатков (current=true — быстрое обновление
+    изменений, resume=true — продолжение прерванного постраничного запуска)
+    """
+    return enqueue_sync(
+        request, 'stock',
+        current=bool(request.data.get('current')),
+        full=bool(request.data.get('full')),
+        resume=bool(request.data.get('resume')),
+    )
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def moysklad_webhook(request):
+    """
+    Приём вебхуков МойСклад (товары, заказы покупателей, остатки).
+    События только сохраняются в очередь, разбирает их process_webhooks.
+    Без настроенного MOYSKLAD_WEBHOOK_TOKEN вебхуки не принимаются.
+    """
+    token = settings.MOYSKLAD_WEBHOOK_TOKEN
+    if not token:
+        logger.error("MOYSKLAD_WEBHOOK_TOKEN не задан, вебхук отклонён")
         return Response({
-            'success': True,
-            'updated': items_updated
-        })
-        
-    except Exception as e:
-        logger.error(f"Ошибка синхронизации остатков: {e}")
-        
-        if 'sync_log' in locals():
-            sync_log.status = 'error'
-            sync_log.error_message = str(e)
-            sync_log.finished_at = timezone.now()
-            sync_log.save()
-        
+            'success': False,
+            'error': 'Токен вебхука не настроен'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if not constant_time_compare(request.query_params.get('token', ''), token):
         return Response({
             'success': False,
-            'error': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            'error': 'Неверный токен вебхука'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    return Response({
+        'success': True,
+        'accepted': save_webhook(request.data)
+    })
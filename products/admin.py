@@ -10,7 +10,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'archived', 'is_promo', 'is_kaspi', 'is_satu', 'brand']
     search_fields = ['sku', 'article', 'name', 'barcode', 'moysklad_id']
     autocomplete_fields = ['brand', 'categories']
-    readonly_fields = ['moysklad_id', 'raw_data', 'created_at', 'updated_at', 'last_sync']
+    readonly_fields = ['moysklad_id', 'raw_data', 'created_at', 'updated_at', 'last_sync', 'seen_at', 'removed_at']
 
     fieldsets = (
         ('Идентификаторы', {
@@ -23,14 +23,14 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('weight', 'volume')
         }),
         ('Флаги', {
-            'fields': ('is_active', 'archived', 'is_promo', 'is_kaspi', 'is_satu')
+            'fields': ('is_active', 'archived', 'removed_at', 'is_promo', 'is_kaspi', 'is_satu')
         }),
         ('МойСклад', {
             'fields': ('moysklad_path', 'raw_data'),
             'classes': ('collapse',)
         }),
         ('Служебное', {
-            'fields': ('created_at', 'updated_at', 'last_sync'),
+            'fields': ('created_at', 'updated_at', 'last_sync', 'seen_at'),
             'classes': ('collapse',)
         }),
     )
\ No newline at end of file
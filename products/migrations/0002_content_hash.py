@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Хэш данных МойСклад'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='seen_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний раз получен из МойСклад'),
+        ),
+    ]
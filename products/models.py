@@ -49,6 +49,10 @@ class Product(models.Model):
 
     # Сырые данные
     raw_data = models.JSONField("Сырые данные", default=dict, blank=True)
+    content_hash = models.CharField("Хэш данных МойСклад", max_length=64, blank=True, default='')
+    seen_at = models.DateTimeField("Последний раз получен из МойСклад", null=True, blank=True)
+    sync_generation = models.BigIntegerField("Поколение синхронизации", null=True, blank=True, db_index=True)
+    removed_at = models.DateTimeField("Удалён в МойСклад", null=True, blank=True)
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)